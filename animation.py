@@ -0,0 +1,145 @@
+# animation.py
+# Time-based animations driven by the main loop's frame delta.
+#
+# Everything advances by seconds rather than frames, so speed no longer
+# depends on the frame rate, and nothing blocks: the loop calls
+# Timeline.update(dt) once per iteration and keeps handling input.
+
+def linear(t):
+    return t
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+class Animation:
+    # Base step: runs for `duration` seconds, then calls on_done. On its own
+    # it is a pause; with duration 0 it just calls on_done (see wait/call).
+
+    def __init__(self, duration=0.0, on_done=None):
+        self.duration = duration
+        self.on_done = on_done
+        self.elapsed = 0.0
+        self.done = False
+
+    def update(self, dt):
+        # Advance by dt seconds. Returns None while running, otherwise the
+        # part of dt left over after finishing (for chaining in a Sequence).
+        if self.done:
+            return dt
+        self.elapsed += dt
+        t = min(1.0, self.elapsed / self.duration) if self.duration > 0 else 1.0
+        self.step(t)
+        if t < 1.0:
+            return None
+        self._complete()
+        return self.elapsed - self.duration
+
+    def finish(self):
+        # Jump to the end state immediately.
+        if not self.done:
+            self.step(1.0)
+            self._complete()
+
+    def step(self, t):
+        pass
+
+    def _complete(self):
+        self.done = True
+        if self.on_done is not None:
+            self.on_done()
+
+
+def wait(seconds):
+    return Animation(seconds)
+
+
+def call(fn):
+    return Animation(0.0, on_done=fn)
+
+
+class Tween(Animation):
+    # Interpolates start -> end, handing each value to on_update(value).
+
+    def __init__(self, start, end, duration, on_update, ease=linear, on_done=None):
+        super().__init__(duration, on_done)
+        self.start = start
+        self.end = end
+        self.on_update = on_update
+        self.ease = ease
+
+    def step(self, t):
+        self.on_update(self.start + (self.end - self.start) * self.ease(t))
+
+
+class Sequence(Animation):
+    # Runs its steps one after another; leftover time carries into the next.
+
+    def __init__(self, steps, on_done=None):
+        super().__init__(sum(s.duration for s in steps), on_done)
+        self.steps = list(steps)
+        self.index = 0
+
+    def update(self, dt):
+        if self.done:
+            return dt
+        while self.index < len(self.steps):
+            dt = self.steps[self.index].update(dt)
+            if dt is None:
+                return None
+            self.index += 1
+        self._complete()
+        return dt
+
+    def finish(self):
+        while not self.done and self.index < len(self.steps):
+            self.steps[self.index].finish()
+            self.index += 1
+        if not self.done:
+            self._complete()
+
+
+class Timeline:
+    # The set of running animations, each under a key. Playing under a key
+    # that is already running replaces (cancels) the old animation.
+
+    def __init__(self):
+        self.now = 0.0   # seconds of animation time so far
+        self.dt = 0.0    # delta of the last update
+        self._running = {}
+
+    @property
+    def active(self):
+        return bool(self._running)
+
+    def play(self, anim, key=None):
+        if key is None:
+            key = id(anim)
+        self._running[key] = anim
+        return anim
+
+    def get(self, key):
+        return self._running.get(key)
+
+    def cancel(self, key, finish=False):
+        # Stop the animation under `key`; with finish=True it first jumps to
+        # its end state and runs its on_done.
+        anim = self._running.pop(key, None)
+        if anim is not None and finish:
+            anim.finish()
+        return anim is not None
+
+    def update(self, dt):
+        self.dt = dt
+        self.now += dt
+        for key, anim in list(self._running.items()):
+            if anim.update(dt) is not None and self._running.get(key) is anim:
+                del self._running[key]
+
+    def pulse(self, rate, amplitude):
+        # Triangle wave 0..amplitude..0 moving `rate` units per second.
+        if amplitude <= 0:
+            return 0
+        phase = (self.now * rate) % (2 * amplitude)
+        return int(phase if phase <= amplitude else 2 * amplitude - phase)
@@ -0,0 +1,207 @@
+# benchmark.py
+# Headless benchmarks for the solver and generation hot paths.
+#
+#   python benchmark.py                      run everything, compare to baseline
+#   python benchmark.py --save-baseline      record the current numbers
+#   python benchmark.py --require-baseline   fail if there is no baseline (CI)
+#   python benchmark.py --filter solve/fast  only cases whose name contains it
+#
+# Nothing here imports pygame. The load_puzzle cases time what
+# main.load_puzzle does on a pool miss: an ungraded quick_puzzle, wrapped in
+# a Puzzle, plus the BoardState. generate/make_puzzle times the graded
+# generation the pool workers run in the background.
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import dlx_solver
+import fast_solver
+import generator
+import grader
+import solver
+from board_state import BoardState
+from puzzle import Puzzle
+from puzzles import easy_puzzle, hard_puzzle, medium_puzzle, sample_grid
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_FILE = os.path.join(HERE, "benchmarks", "hard_puzzles.txt")
+BASELINE_FILE = os.path.join(HERE, "benchmarks", "baseline.json")
+
+BUILTIN = {
+    "easy_puzzle": easy_puzzle,
+    "medium_puzzle": medium_puzzle,
+    "hard_puzzle": hard_puzzle,
+    "sample_grid": sample_grid,
+}
+
+
+def load_corpus(path=CORPUS_FILE):
+    corpus = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            name, digits = line.split()
+            corpus[name] = [[int(digits[r * 9 + c]) for c in range(9)] for r in range(9)]
+    return corpus
+
+
+def _copy(board):
+    return [row[:] for row in board]
+
+
+def build_cases():
+    # name -> zero-argument callable timed once per run
+    cases = {}
+    boards = dict(BUILTIN)
+    boards.update(load_corpus())
+
+    for name, board in boards.items():
+        cases[f"solve/fast/{name}"] = lambda b=board: fast_solver.solve(_copy(b))
+        cases[f"solve/dlx/{name}"] = lambda b=board: dlx_solver.solve(b)
+        cases[f"grade/{name}"] = lambda b=board: grader._grade_key.__wrapped__(grader.canonical_key(b))
+    # The legacy backtracker takes seconds on hard inputs; keep it to the
+    # easy boards so the suite stays quick while still tracking it.
+    for name in ("easy_puzzle", "sample_grid"):
+        cases[f"solve/legacy/{name}"] = lambda b=BUILTIN[name]: solver.solve(_copy(b))
+
+    empty = [[0] * 9 for _ in range(9)]
+    cases["generate/solve_board_empty"] = lambda: fast_solver.solve(_copy(empty), randomize=True)
+    stream = generator.solution_stream()
+    cases["generate/full_board"] = lambda: next(stream)
+
+    for difficulty, holes in generator.CELLS_TO_REMOVE.items():
+        cases[f"generate/remove_cells/{difficulty}"] = lambda h=holes: generator.dig_puzzle(next(stream), h)
+        cases[f"generate/make_puzzle/{difficulty}"] = lambda d=difficulty: generator.make_puzzle(d)
+        cases[f"load_puzzle/{difficulty}"] = lambda d=difficulty: _load_puzzle(d)
+    return cases
+
+
+def _load_puzzle(difficulty):
+    grid, solution = generator.quick_puzzle(difficulty)
+    puzzle = Puzzle(grid, solution, difficulty)
+    BoardState(puzzle.givens)
+    return puzzle
+
+
+def percentile(sorted_times, q):
+    if not sorted_times:
+        return 0.0
+    k = (len(sorted_times) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_times) - 1)
+    return sorted_times[lo] + (sorted_times[hi] - sorted_times[lo]) * (k - lo)
+
+
+def summarize(times):
+    times = sorted(times)
+    total = sum(times)
+    return {
+        "runs": len(times),
+        "mean_ms": total / len(times) * 1e3,
+        "p50_ms": percentile(times, 0.50) * 1e3,
+        "p95_ms": percentile(times, 0.95) * 1e3,
+        "p99_ms": percentile(times, 0.99) * 1e3,
+        "ops_per_sec": len(times) / total if total else float("inf"),
+    }
+
+
+def run_case(fn, repeat, warmup=2):
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return summarize(times)
+
+
+def compare(results, baseline, threshold, metric):
+    # Cases whose `metric` got slower than baseline * (1 + threshold).
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get(metric):
+            continue
+        ratio = stats[metric] / base[metric]
+        if ratio > 1 + threshold:
+            regressions.append((name, base[metric], stats[metric], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sudoku solver/generator benchmarks")
+    parser.add_argument("--repeat", type=int, default=30, help="timed runs per case")
+    parser.add_argument("--filter", default="", help="only run cases containing this text")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="fail instead of passing when the baseline file is missing")
+    parser.add_argument("--threshold", type=float, default=0.30,
+                        help="allowed slowdown vs baseline, 0.30 = 30%%")
+    parser.add_argument("--metric", default="p50_ms",
+                        choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--output", help="also write this run's results to a JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in build_cases().items():
+        if args.filter not in name:
+            continue
+        # same random boards every run, so generation cases compare with the baseline
+        random.seed(name)
+        stats = run_case(fn, args.repeat)
+        results[name] = stats
+        print(f"{name:40s} mean {stats['mean_ms']:9.3f}  p50 {stats['p50_ms']:9.3f}  "
+              f"p95 {stats['p95_ms']:9.3f}  p99 {stats['p99_ms']:9.3f} ms  "
+              f"{stats['ops_per_sec']:10.1f} ops/s")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        if os.path.exists(args.baseline):
+            # keep cases that were filtered out of this run
+            with open(args.baseline) as f:
+                old = json.load(f)
+            old.get("results", {}).update(results)
+            report["results"] = old.get("results", results)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("no baseline yet; run with --save-baseline to record one")
+        return 1 if args.require_baseline else 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.metric)
+    for name, before, after, ratio in regressions:
+        print(f"REGRESSION {name}: {args.metric} {before:.3f} -> {after:.3f} ms ({ratio:.2f}x)")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.threshold:.0%} on {args.metric}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+# board_state.py
+# Incrementally maintained validity bookkeeping for a board being played.
+#
+# For each of the 27 units we keep the set of cells holding each digit, plus
+# a filled-cell counter and, per cell, how many of its units contain a
+# duplicate of its digit. A keystroke touches at most three units, so every
+# query the game loop asks each frame is answered without scanning the board.
+
+from fast_solver import BOX_OF, COL_OF, ROW_OF
+
+CELL_UNITS = [(ROW_OF[i], 9 + COL_OF[i], 18 + BOX_OF[i]) for i in range(81)]
+
+
+class BoardState:
+
+    def __init__(self, board):
+        self.cells = [0] * 81
+        self.positions = [[set() for _ in range(10)] for _ in range(27)]
+        self.filled = 0
+        self.duplicates = 0  # (unit, digit) pairs present more than once
+        self.conflict_units = [0] * 81
+        self.conflicts = set()
+        self.version = 0  # bumped on every change, for render caches
+        for r in range(9):
+            for c in range(9):
+                if board[r][c]:
+                    self.set(r, c, board[r][c])
+
+    def set(self, r, c, value):
+        idx = r * 9 + c
+        old = self.cells[idx]
+        if old == value:
+            return
+        self.version += 1
+        if old:
+            self._remove(idx, old)
+        if value:
+            self._add(idx, value)
+
+    def _add(self, idx, d):
+        self.cells[idx] = d
+        self.filled += 1
+        for u in CELL_UNITS[idx]:
+            cells = self.positions[u][d]
+            cells.add(idx)
+            if len(cells) == 2:
+                self.duplicates += 1
+                for other in cells:
+                    self._bump(other, 1)
+            elif len(cells) > 2:
+                self._bump(idx, 1)
+
+    def _remove(self, idx, d):
+        self.cells[idx] = 0
+        self.filled -= 1
+        for u in CELL_UNITS[idx]:
+            cells = self.positions[u][d]
+            if len(cells) == 2:
+                self.duplicates -= 1
+                for other in cells:
+                    self._bump(other, -1)
+            elif len(cells) > 2:
+                self._bump(idx, -1)
+            cells.discard(idx)
+
+    def _bump(self, idx, delta):
+        n = self.conflict_units[idx] + delta
+        self.conflict_units[idx] = n
+        if n:
+            self.conflicts.add(idx)
+        else:
+            self.conflicts.discard(idx)
+
+    def is_complete(self):
+        return self.filled == 81
+
+    def is_valid(self):
+        return not self.duplicates
+
+    def is_solved(self):
+        return self.filled == 81 and not self.duplicates
+
+    def conflicts_at(self, r, c):
+        # Cells clashing with (r, c), including (r, c) itself; [] if none.
+        idx = r * 9 + c
+        if not self.conflict_units[idx]:
+            return []
+        d = self.cells[idx]
+        bad = set()
+        for u in CELL_UNITS[idx]:
+            cells = self.positions[u][d]
+            if len(cells) > 1:
+                bad |= cells
+        return [divmod(i, 9) for i in bad]
+
+    def unit_counts(self, u):
+        return [len(self.positions[u][d]) for d in range(10)]
+
@@ -0,0 +1,110 @@
+# compositor.py
+# Layered rendering: each layer is drawn into its own cached surface and only
+# redrawn when its input key changes. The layers are flattened into one
+# surface whenever any of them changed, so an unchanged frame costs a
+# single blit.
+
+import pygame
+
+_UNSET = object()
+
+
+class Layer:
+
+    def __init__(self, name, draw, opaque=False):
+        self.name = name
+        self.draw = draw  # draw(surface) paints the layer from current state
+        self.opaque = opaque
+        self.surface = None
+        self.key = _UNSET
+        self.rebuilds = 0
+
+    def refresh(self, size, key):
+        # Redraw if the key changed; True when the layer was rebuilt.
+        if self.surface is None or self.surface.get_size() != size:
+            self.surface = _new_surface(size, self.opaque)
+            self.key = _UNSET
+        if self.key is not _UNSET and key == self.key:
+            return False
+        self.surface.fill((0, 0, 0) if self.opaque else (0, 0, 0, 0))
+        self.draw(self.surface)
+        self.key = key
+        self.rebuilds += 1
+        return True
+
+
+class Compositor:
+
+    def __init__(self, size):
+        self.size = tuple(size)
+        self.layers = []
+        self.flat = None
+        self.flattens = 0
+
+    def add_layer(self, name, draw, opaque=False):
+        layer = Layer(name, draw, opaque)
+        self.layers.append(layer)
+        return layer
+
+    def compose(self, target, keys, pos=(0, 0), rects=None):
+        # keys: layer name -> anything hashable/comparable describing the
+        # layer's inputs. With `rects`, only those areas are copied to the
+        # target. Returns True when the flattened image changed.
+        dirty = False
+        for layer in self.layers:
+            if layer.refresh(self.size, keys.get(layer.name)):
+                dirty = True
+        if self.flat is None:
+            self.flat = _new_surface(self.size, True)
+            dirty = True
+        if dirty:
+            self.flat.fill((0, 0, 0))
+            for layer in self.layers:
+                self.flat.blit(layer.surface, (0, 0))
+            self.flattens += 1
+        if rects is None:
+            target.blit(self.flat, pos)
+        else:
+            for rect in rects:
+                rect = pygame.Rect(rect)
+                target.blit(self.flat, (pos[0] + rect.x, pos[1] + rect.y), rect)
+        return dirty
+
+    def invalidate(self, size=None):
+        # Force every layer to rebuild, e.g. after a resize.
+        if size is not None:
+            self.size = tuple(size)
+        for layer in self.layers:
+            layer.key = _UNSET
+            layer.surface = None
+        self.flat = None
+
+
+class OverlayPool:
+    # Translucent fills (highlights, press flashes, conflict marks) built once
+    # per (size, colour, radius) and reused instead of allocated per frame.
+
+    def __init__(self):
+        self._surfaces = {}
+
+    def get(self, size, rgba, border_radius=0):
+        key = (tuple(size), tuple(rgba), border_radius)
+        surf = self._surfaces.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            if border_radius:
+                pygame.draw.rect(surf, rgba, surf.get_rect(), border_radius=border_radius)
+            else:
+                surf.fill(rgba)
+            self._surfaces[key] = surf
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+def _new_surface(size, opaque):
+    surf = pygame.Surface(size, 0 if opaque else pygame.SRCALPHA)
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert() if opaque else surf.convert_alpha()
+    return surf
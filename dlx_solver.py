@@ -0,0 +1,232 @@
+# dlx_solver.py
+# Exact-cover Sudoku backend using Knuth's Dancing Links (Algorithm X).
+#
+# The puzzle is a 729-row x 324-column matrix: one row per (cell, digit)
+# candidate and four constraint columns per row (cell filled, digit in row,
+# digit in column, digit in box). The links live in flat integer lists so
+# cover/uncover are plain index updates, and the search is iterative so it
+# can be suspended as a generator between solutions.
+
+import solve_stats
+
+N_COLS = 324
+
+_template = None
+
+
+def _build_template():
+    # Node 0 is the root, 1..324 are the column headers, data nodes follow.
+    left = list(range(-1, N_COLS))
+    left[0] = N_COLS
+    right = list(range(1, N_COLS + 2))
+    right[N_COLS] = 0
+    up = list(range(N_COLS + 1))
+    down = list(range(N_COLS + 1))
+    col = list(range(N_COLS + 1))
+    row_id = [-1] * (N_COLS + 1)
+    size = [0] * (N_COLS + 1)
+    first = [0] * 729
+
+    for r in range(9):
+        for c in range(9):
+            b = (r // 3) * 3 + c // 3
+            for d in range(9):
+                k = (r * 9 + c) * 9 + d
+                columns = (
+                    1 + r * 9 + c,
+                    1 + 81 + r * 9 + d,
+                    1 + 162 + c * 9 + d,
+                    1 + 243 + b * 9 + d,
+                )
+                start = len(col)
+                first[k] = start
+                for i, h in enumerate(columns):
+                    n = start + i
+                    left.append(start + (i - 1) % 4)
+                    right.append(start + (i + 1) % 4)
+                    up.append(up[h])
+                    down.append(h)
+                    down[up[h]] = n
+                    up[h] = n
+                    col.append(h)
+                    row_id.append(k)
+                    size[h] += 1
+    return left, right, up, down, col, row_id, size, first
+
+
+class DLXSudoku:
+
+    def __init__(self, board):
+        global _template
+        if _template is None:
+            _template = _build_template()
+        left, right, up, down, col, row_id, size, first = _template
+        self.L = left[:]
+        self.R = right[:]
+        self.U = up[:]
+        self.D = down[:]
+        self.C = col
+        self.row_id = row_id
+        self.S = size[:]
+        self.givens = []
+        self.valid = True
+
+        covered = set()
+        for r in range(9):
+            for c in range(9):
+                d = board[r][c]
+                if not d:
+                    continue
+                k = (r * 9 + c) * 9 + d - 1
+                node = first[k]
+                heads = [self.C[node + i] for i in range(4)]
+                if covered.intersection(heads):
+                    self.valid = False
+                    return
+                for h in heads:
+                    self._cover(h)
+                    covered.add(h)
+                self.givens.append(k)
+
+    def _cover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                D[U[j]] = D[j]
+                U[D[j]] = U[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def _uncover(self, c):
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                D[U[j]] = j
+                U[D[j]] = j
+                j = L[j]
+            i = U[i]
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def _choose_column(self):
+        R, S = self.R, self.S
+        best, best_size = 0, 730
+        j = R[0]
+        while j:
+            s = S[j]
+            if s < best_size:
+                best, best_size = j, s
+                if s <= 1:
+                    break
+            j = R[j]
+        return best
+
+    def solutions(self, stats=None):
+        # Yields the chosen candidate rows (including givens) for each
+        # exact cover; the matrix is fully restored once exhausted.
+        stats = solve_stats.begin(stats, "dlx")
+        try:
+            if self.valid:
+                yield from self._search(stats)
+        finally:
+            solve_stats.finish(stats)
+
+    def _search(self, stats):
+        R, L, D, C = self.R, self.L, self.D, self.C
+        rows = []
+        cols = []
+        while True:
+            backtrack = True
+            if R[0] == 0:
+                if stats is not None:
+                    stats.solutions += 1
+                yield self.givens + [self.row_id[n] for n in rows]
+            else:
+                c = self._choose_column()
+                if stats is not None:
+                    stats.nodes += 1
+                    if self.S[c] == 1:
+                        stats.propagations += 1
+                    if len(rows) > stats.max_depth:
+                        stats.max_depth = len(rows)
+                if self.S[c]:
+                    if stats is not None:
+                        stats.candidates_tried += 1
+                    self._cover(c)
+                    r = D[c]
+                    cols.append(c)
+                    rows.append(r)
+                    j = R[r]
+                    while j != r:
+                        self._cover(C[j])
+                        j = R[j]
+                    backtrack = False
+            if not backtrack:
+                continue
+
+            while True:
+                if not rows:
+                    return
+                r = rows.pop()
+                c = cols[-1]
+                if stats is not None:
+                    stats.backtracks += 1
+                j = L[r]
+                while j != r:
+                    self._uncover(C[j])
+                    j = L[j]
+                r = D[r]
+                if r != c:
+                    if stats is not None:
+                        stats.candidates_tried += 1
+                    rows.append(r)
+                    j = R[r]
+                    while j != r:
+                        self._cover(C[j])
+                        j = R[j]
+                    break
+                self._uncover(c)
+                cols.pop()
+
+
+def _to_grid(candidates):
+    board = [[0] * 9 for _ in range(9)]
+    for k in candidates:
+        cell, d = divmod(k, 9)
+        board[cell // 9][cell % 9] = d + 1
+    return board
+
+
+def iter_solutions(board, stats=None):
+    # Lazily enumerate every solution of `board` as a fresh 9x9 grid.
+    for candidates in DLXSudoku(board).solutions(stats):
+        yield _to_grid(candidates)
+
+
+def solve(board, stats=None):
+    # First solution as a new grid, or None when the puzzle has none.
+    solutions = iter_solutions(board, stats)
+    try:
+        return next(solutions, None)
+    finally:
+        solutions.close()
+
+
+def count_solutions(board, limit=None, stats=None):
+    # Number of solutions, stopping early once `limit` is reached.
+    found = 0
+    search = DLXSudoku(board).solutions(stats)
+    for _ in search:
+        found += 1
+        if limit is not None and found >= limit:
+            break
+    search.close()
+    return found
@@ -0,0 +1,220 @@
+# fast_solver.py
+# Bitmask constraint-propagation solver.
+#
+# Every row, column and box keeps a bitmask of the digits already used
+# (bit d set => digit d present), so the candidates of a cell are a couple of
+# ORs away instead of a 27-cell rescan. Search always branches on the empty
+# cell with the fewest candidates (MRV) after placing naked and hidden singles.
+
+import random
+
+import solve_stats
+
+ALL = 0x3FE  # bits 1..9
+
+ROW_OF = [i // 9 for i in range(81)]
+COL_OF = [i % 9 for i in range(81)]
+BOX_OF = [(i // 27) * 3 + (i % 9) // 3 for i in range(81)]
+
+UNITS = (
+    [[r * 9 + c for c in range(9)] for r in range(9)]
+    + [[r * 9 + c for r in range(9)] for c in range(9)]
+    + [[(b // 3) * 27 + (b % 3) * 3 + (k // 3) * 9 + k % 3 for k in range(9)] for b in range(9)]
+)
+
+BIT_DIGIT = {1 << d: d for d in range(1, 10)}
+POPCOUNT = [bin(m).count("1") for m in range(1024)]
+
+
+class BitBoard:
+    # Mutable solver state. `cells` is the flat 81-cell board, the three mask
+    # lists track which digits every row / column / box already holds.
+
+    def __init__(self, board):
+        self.cells = [0] * 81
+        self.rows = [0] * 9
+        self.cols = [0] * 9
+        self.boxes = [0] * 9
+        self.valid = True
+        for r in range(9):
+            for c in range(9):
+                d = board[r][c]
+                if d:
+                    idx = r * 9 + c
+                    if self.candidates(idx) & (1 << d):
+                        self.place(idx, d)
+                    else:
+                        self.valid = False
+                        self.cells[idx] = d
+
+    def place(self, idx, d):
+        bit = 1 << d
+        self.cells[idx] = d
+        self.rows[ROW_OF[idx]] |= bit
+        self.cols[COL_OF[idx]] |= bit
+        self.boxes[BOX_OF[idx]] |= bit
+
+    def clear(self, idx):
+        d = self.cells[idx]
+        if d:
+            mask = ~(1 << d)
+            self.cells[idx] = 0
+            self.rows[ROW_OF[idx]] &= mask
+            self.cols[COL_OF[idx]] &= mask
+            self.boxes[BOX_OF[idx]] &= mask
+
+    def candidates(self, idx):
+        return ALL & ~(self.rows[ROW_OF[idx]] | self.cols[COL_OF[idx]] | self.boxes[BOX_OF[idx]])
+
+    def to_grid(self):
+        return [self.cells[r * 9:r * 9 + 9] for r in range(9)]
+
+    def solve(self, rng=None, stats=None):
+        # Fill the board in place; on failure the board is left untouched.
+        found = self._run(1, rng, stats)
+        return found > 0
+
+    def count_solutions(self, limit=2, stats=None):
+        # Count solutions up to `limit`; the board is always restored so the
+        # same state can be reused for the next query.
+        return self._run(limit, None, stats, restore=True)
+
+    def _run(self, limit, rng, stats, restore=False):
+        stats = solve_stats.begin(stats, "bitmask")
+        found = 0
+        if self.valid:
+            empties = [i for i in range(81) if not self.cells[i]]
+            found = self._search(limit, rng, stats)
+            if stats is not None:
+                stats.solutions += found
+            if restore or not found:
+                self._restore(empties)
+        solve_stats.finish(stats)
+        return found
+
+    def _restore(self, empties):
+        for idx in empties:
+            if self.cells[idx]:
+                self.clear(idx)
+
+    def _propagate(self, trail):
+        # Place naked and hidden singles until nothing changes.
+        # Returns (idx, mask) of the MRV branching cell, (-1, 0) when the
+        # board is full, or None on a contradiction.
+        cells, rows, cols, boxes = self.cells, self.rows, self.cols, self.boxes
+        cand = [0] * 81
+        while True:
+            best, best_count, best_mask = -1, 10, 0
+            placed = False
+            for idx in range(81):
+                if cells[idx]:
+                    continue
+                r, c, b = ROW_OF[idx], COL_OF[idx], BOX_OF[idx]
+                m = ALL & ~(rows[r] | cols[c] | boxes[b])
+                if not m:
+                    return None
+                n = POPCOUNT[m]
+                if n == 1:
+                    d = BIT_DIGIT[m]
+                    cells[idx] = d
+                    rows[r] |= m
+                    cols[c] |= m
+                    boxes[b] |= m
+                    trail.append(idx)
+                    placed = True
+                    continue
+                cand[idx] = m
+                if n < best_count:
+                    best, best_count, best_mask = idx, n, m
+            if placed:
+                continue
+            if best < 0:
+                return (-1, 0)
+
+            for unit in UNITS:
+                once = twice = used = 0
+                for idx in unit:
+                    if cells[idx]:
+                        used |= 1 << cells[idx]
+                    else:
+                        m = cand[idx]
+                        twice |= once & m
+                        once |= m
+                if (once | used) != ALL:
+                    return None
+                hidden = once & ~twice & ~used
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for idx in unit:
+                        if not cells[idx] and cand[idx] & bit:
+                            if not self.candidates(idx) & bit:
+                                return None
+                            self.place(idx, BIT_DIGIT[bit])
+                            trail.append(idx)
+                            placed = True
+                            break
+            if not placed:
+                return (best, best_mask)
+
+    def _search(self, limit, rng, stats=None, depth=0):
+        # `stats` (a solve_stats.SolveStats) is only touched at the counter
+        # sites; the cost for the uninstrumented path is a None check per node
+        # and per candidate, within benchmark noise.
+        if stats is not None:
+            stats.nodes += 1
+            if depth > stats.max_depth:
+                stats.max_depth = depth
+        trail = []
+        state = self._propagate(trail)
+        if stats is not None:
+            stats.propagations += len(trail)
+        if state is None:
+            self._undo(trail)
+            return 0
+        idx, mask = state
+        if idx < 0:
+            if limit <= 1:
+                return 1  # keep the solution on the board
+            self._undo(trail)
+            return 1
+
+        digits = []
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            digits.append(BIT_DIGIT[bit])
+        if rng is not None:
+            rng.shuffle(digits)
+
+        found = 0
+        for d in digits:
+            if stats is not None:
+                stats.candidates_tried += 1
+            self.place(idx, d)
+            found += self._search(limit - found, rng, stats, depth + 1)
+            if found >= limit:
+                return found
+            if stats is not None:
+                stats.backtracks += 1
+            self.clear(idx)
+        self._undo(trail)
+        return found
+
+    def _undo(self, trail):
+        for idx in reversed(trail):
+            self.clear(idx)
+
+
+def solve(board, randomize=False, stats=None):
+    # Same contract as solver.solve: fills `board` in place, returns a bool.
+    state = BitBoard(board)
+    if not state.solve(random if randomize else None, stats):
+        return False
+    for r in range(9):
+        board[r][:] = state.cells[r * 9:r * 9 + 9]
+    return True
+
+
+def count_solutions(board, limit=2, stats=None):
+    return BitBoard(board).count_solutions(limit, stats)
@@ -0,0 +1,143 @@
+# frame_profiler.py
+# Lightweight per-frame timing for the render loop.
+#
+# Stages are timed exclusively: a stage's time excludes the stages nested
+# inside it, so the breakdown adds up to the frame. Functions opt in with the
+# timed() decorator, loop sections with push()/pop(). While disabled every
+# hook is a single attribute check.
+#
+# Finished frames are kept in a short history for the overlay and, when a
+# trace is open, written as one JSON object per line.
+
+import functools
+import json
+import time
+from collections import deque
+
+import surface_tracker
+
+
+class FrameProfiler:
+
+    def __init__(self, history=120, alloc_count=None):
+        self.enabled = False
+        self.history = deque(maxlen=history)
+        # Surfaces allocated so far; the per-frame difference is reported
+        self.alloc_count = alloc_count or surface_tracker.count
+        self._want = False
+        self._trace = None
+        self._stack = []
+        self._stages = {}
+        self._mark = 0.0
+        self._frame_start = None
+        self._frame_info = {}
+        self._allocs = 0
+
+    def set_enabled(self, on):
+        # Applied at the next frame boundary so no stage straddles the switch.
+        self._want = on or self._trace is not None
+
+    def start_trace(self, path):
+        self._trace = open(path, "a")
+        self._want = True
+
+    def stop_trace(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    def timed(self, name):
+        # Decorator timing every call of the function as stage `name`.
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                self.push(name)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.pop()
+            return wrapper
+        return decorate
+
+    def push(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._stack:
+            top = self._stack[-1]
+            self._stages[top] = self._stages.get(top, 0.0) + now - self._mark
+        self._stack.append(name)
+        self._mark = now
+
+    def pop(self):
+        if not self.enabled or not self._stack:
+            return
+        now = time.perf_counter()
+        name = self._stack.pop()
+        self._stages[name] = self._stages.get(name, 0.0) + now - self._mark
+        self._mark = now
+
+    def next_frame(self, **info):
+        # Close the running frame (and any open stages) and start a new one;
+        # `info` (e.g. screen=...) is stored with the new frame's record.
+        now = time.perf_counter()
+        if self.enabled and self._frame_start is not None:
+            while self._stack:
+                self.pop()
+            self._record(now)
+        if self._want != self.enabled:
+            if self._want:
+                surface_tracker.install()
+            else:
+                surface_tracker.uninstall()
+            self.enabled = self._want
+        if not self.enabled:
+            self._frame_start = None
+            return
+        self._stack = []
+        self._stages = {}
+        self._mark = self._frame_start = now
+        self._frame_info = info
+        self._allocs = self.alloc_count()
+
+    def _record(self, now):
+        stages = {name: t * 1e3 for name, t in self._stages.items()}
+        idle = stages.pop("idle", 0.0)
+        interval = (now - self._frame_start) * 1e3
+        record = {
+            "t": round(time.time(), 3),
+            "frame_ms": interval - idle,   # work, without the frame-cap sleep
+            "interval_ms": interval,
+            "stages": stages,
+            "surfaces": self.alloc_count() - self._allocs,
+        }
+        record.update(self._frame_info)
+        self.history.append(record)
+        if self._trace is not None:
+            self._trace.write(json.dumps(record) + "\n")
+
+    def summary(self, frames=60):
+        # Averages over the last `frames` frames, for the overlay.
+        recent = list(self.history)[-frames:]
+        if not recent:
+            return None
+        times = sorted(r["frame_ms"] for r in recent)
+        interval = sum(r["interval_ms"] for r in recent)
+        stages = {}
+        for r in recent:
+            for name, ms in r["stages"].items():
+                stages[name] = stages.get(name, 0.0) + ms / len(recent)
+        return {
+            "fps": len(recent) * 1e3 / interval if interval else 0.0,
+            "frame_ms": sum(times) / len(times),
+            "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+            "stages": stages,
+            "surfaces": recent[-1]["surfaces"],
+        }
+
+    def close(self):
+        self.stop_trace()
+        if surface_tracker.installed():
+            surface_tracker.uninstall()
@@ -0,0 +1,238 @@
+# game_log.py
+# Append-only log of every finished game, for averages and trends that the
+# per-level counters in the user store cannot give.
+#
+#   history/games-000001.log    one JSON array per line:
+#   history/games-000002.log    [finished, user, level, puzzle, seconds, won, moves, hinted]
+#
+# Lines written before `hinted` was added have seven fields and read as
+# games without hints.
+#
+# Lines go to the newest segment; once it passes `segment_bytes` the next
+# batch starts a new one, so no file grows without bound and old segments
+# can be archived or deleted whole. Like user_store.UserStore, appends are
+# buffered and written with one fsync per batch, either at once or by an
+# attached persister.WriteBehind.
+#
+# Per-user statistics come from a streaming pass over the segments, a line
+# at a time in constant memory, and are cached per user. prepare() runs the
+# pass on a background thread (the game calls it at login) and summary()
+# only ever reads the cache, so the game loop never reads the log. Appends
+# fold into the cached entry (the same update the pass makes).
+
+import json
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+from persister import PersistedStore
+from user_store import LEVELS
+
+LOG_DIR = "history"
+SEGMENT_BYTES = 1 << 20
+SEGMENT_NAME = re.compile(r"games-(\d{6})\.log$")
+
+GameRecord = namedtuple("GameRecord", "finished user level puzzle seconds won moves hinted")
+
+
+class LevelSummary:
+    # Running totals for one user and level; add() folds in one game. Wins
+    # that used a hint count as won but are left out of the times.
+    __slots__ = ("played", "won", "lost", "best_time", "timed_wins", "win_seconds", "moves",
+                 "last_played")
+
+    def __init__(self):
+        self.played = self.won = self.lost = 0
+        self.best_time = None
+        self.timed_wins = 0
+        self.win_seconds = 0
+        self.moves = 0
+        self.last_played = None
+
+    def add(self, record):
+        self.played += 1
+        self.moves += record.moves
+        self.last_played = record.finished
+        if record.won:
+            self.won += 1
+            if record.hinted:
+                return
+            self.timed_wins += 1
+            self.win_seconds += record.seconds
+            if self.best_time is None or record.seconds < self.best_time:
+                self.best_time = record.seconds
+        else:
+            self.lost += 1
+
+    @property
+    def avg_time(self):
+        return self.win_seconds / self.timed_wins if self.timed_wins else None
+
+    @property
+    def avg_moves(self):
+        return self.moves / self.played if self.played else None
+
+
+def _new_summary():
+    return {level: LevelSummary() for level in LEVELS}
+
+
+def _parse(line):
+    finished, user, level, puzzle, seconds, won, moves, *hinted = json.loads(line)
+    return GameRecord(finished, user, level, puzzle, seconds, bool(won), moves,
+                      bool(hinted and hinted[0]))
+
+
+def _drop_torn_tail(path):
+    # Cut a partial last line (crash mid-write) so new lines start clean.
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(max(0, size - 4096))
+        tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        f.truncate(size - len(tail) + cut + 1 if cut >= 0 else max(0, size - len(tail)))
+
+
+class GameLog(PersistedStore):
+
+    def __init__(self, directory=LOG_DIR, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._pending = []     # encoded lines not yet written
+        self._cache = {}       # user -> {level: LevelSummary}
+        self._preparing = set()
+        self._segment = None   # open file of the newest segment
+        self._lock = threading.Lock()
+        # held while lines move from _pending to disk, so a scan sees each
+        # record exactly once
+        self._io_lock = threading.Lock()
+
+    def segments(self):
+        # Segment paths, oldest first.
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.directory, n) for n in sorted(names) if SEGMENT_NAME.match(n)]
+
+    # ---- writes ----
+    def append(self, user, level, puzzle, seconds, won, moves, hinted=False, finished=None):
+        record = GameRecord(time.time() if finished is None else finished,
+                            user, level, puzzle, int(seconds), bool(won), int(moves), bool(hinted))
+        line = json.dumps([round(record.finished, 3), user, level, puzzle, record.seconds,
+                           int(record.won), record.moves, int(record.hinted)], separators=(",", ":"))
+        with self._lock:
+            self._pending.append(line.encode() + b"\n")
+            summary = self._cache.get(user)
+            if summary is not None:
+                summary[level].add(record)
+        self._changed()
+        return record
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def write_pending(self):
+        with self._io_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return 0
+            try:
+                f = self._open_segment()
+                f.write(b"".join(lines))
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                with self._lock:
+                    self._pending[:0] = lines
+                raise
+        return len(lines)
+
+    def _open_segment(self):
+        # The newest segment, or a new one once it is full.
+        if self._segment is not None and self._segment.tell() < self.segment_bytes:
+            return self._segment
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+        os.makedirs(self.directory, exist_ok=True)
+        existing = self.segments()
+        number = int(SEGMENT_NAME.search(existing[-1]).group(1)) if existing else 1
+        path = os.path.join(self.directory, f"games-{number:06d}.log")
+        if os.path.exists(path):
+            _drop_torn_tail(path)
+            if os.path.getsize(path) >= self.segment_bytes:
+                path = os.path.join(self.directory, f"games-{number + 1:06d}.log")
+        self._segment = open(path, "ab")
+        return self._segment
+
+    # ---- reads ----
+    def records(self, user=None):
+        # Every record (or one user's), oldest first, read a line at a time.
+        # A torn last line from a crash mid-write is skipped.
+        for path in self.segments():
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = _parse(line)
+                    except ValueError:
+                        continue
+                    if user is None or record.user == user:
+                        yield record
+
+    def summary(self, user):
+        # The cached {level: LevelSummary}, or None until prepare() has built
+        # it. Never touches the disk.
+        return self._cache.get(user)
+
+    def prepare(self, user, on_ready=None):
+        # Build the user's summary on a background thread, then call
+        # on_ready() from that thread. Does nothing if it is already cached
+        # or being built.
+        with self._lock:
+            if user in self._cache or user in self._preparing:
+                return
+            self._preparing.add(user)
+        threading.Thread(target=self._prepare, args=(user, on_ready),
+                         name="game-log-summary", daemon=True).start()
+
+    def _prepare(self, user, on_ready):
+        try:
+            self.stats(user)
+        finally:
+            with self._lock:
+                self._preparing.discard(user)
+        if on_ready is not None:
+            on_ready()
+
+    def stats(self, user):
+        # {level: LevelSummary}, from the cache or one pass over the log. The
+        # pass reads every segment and waits out a batch being written:
+        # call it through prepare(), not from the game loop.
+        summary = self._cache.get(user)
+        if summary is not None:
+            return summary
+        summary = _new_summary()
+        with self._io_lock:
+            for record in self.records(user):
+                if record.level in summary:
+                    summary[record.level].add(record)
+            with self._lock:
+                for line in self._pending:
+                    record = _parse(line)
+                    if record.user == user and record.level in summary:
+                        summary[record.level].add(record)
+                self._cache[user] = summary
+        return summary
+
+    def _close_files(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
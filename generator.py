@@ -0,0 +1,124 @@
+# generator.py
+# Puzzle generation by digging holes into a solved grid while keeping the
+# solution unique.
+
+import random
+
+from fast_solver import BitBoard
+from grader import DIFFICULTY_LEVELS, difficulty_of, grade
+
+# How many holes to aim for; the grader decides what the result rates as
+CELLS_TO_REMOVE = {"Easy": 35, "Medium": 50, "Hard": 60}
+MAX_ATTEMPTS = 8
+# Holes for puzzles that are never graded (quick_puzzle and the old
+# screens); fewer, so ungraded Medium/Hard do not come out harder than
+# they used to be
+UNGRADED_CELLS_TO_REMOVE = {"Easy": 35, "Medium": 45, "Hard": 55}
+
+# Any valid solution works as a seed; this is the classic shifted pattern
+SEED_GRID = [[(r * 3 + r // 3 + c) % 9 + 1 for c in range(9)] for r in range(9)]
+RESEED_EVERY = 1000
+
+
+def _line_order(rng):
+    # Bands (or stacks) in random order, lines within each band shuffled.
+    bands = [0, 1, 2]
+    rng.shuffle(bands)
+    order = []
+    for b in bands:
+        lines = [b * 3, b * 3 + 1, b * 3 + 2]
+        rng.shuffle(lines)
+        order.extend(lines)
+    return order
+
+
+def shuffled_solution(rng=random, seed=SEED_GRID):
+    # Apply random validity-preserving transforms to a solved grid: digit
+    # relabelling, row/column swaps inside bands/stacks, band/stack swaps and
+    # an optional transpose. O(81), no search.
+    digits = list(range(1, 10))
+    rng.shuffle(digits)
+    relabel = [0] + digits
+    rows = _line_order(rng)
+    cols = _line_order(rng)
+    if rng.random() < 0.5:
+        return [[relabel[seed[c][r]] for c in cols] for r in rows]
+    return [[relabel[seed[r][c]] for c in cols] for r in rows]
+
+
+def random_solution(rng=random):
+    # Solved grid from a randomized search; slower, but not tied to a seed.
+    state = BitBoard([[0] * 9 for _ in range(9)])
+    state.solve(rng)
+    return state.to_grid()
+
+
+def solution_stream(rng=random, reseed_every=RESEED_EVERY):
+    # Endless stream of solved grids. Transforms only reach the seed's
+    # equivalence class, so the seed itself is replaced by a searched grid
+    # every `reseed_every` items to keep covering the space of solutions.
+    seed = SEED_GRID
+    produced = 0
+    while True:
+        if reseed_every and produced and produced % reseed_every == 0:
+            seed = random_solution(rng)
+        yield shuffled_solution(rng, seed)
+        produced += 1
+
+
+def dig_puzzle(solution, cells_to_remove, order=None, rng=random):
+    # Blank up to `cells_to_remove` cells of `solution`, trying them in
+    # `order` (shuffled when omitted). A removal is kept only when the
+    # solution counter, capped at 2, still reports exactly one solution.
+    # The same BitBoard is reused for every attempt: count_solutions()
+    # restores it, so each try is a clear() plus a bounded search.
+    state = BitBoard(solution)
+    if order is None:
+        order = list(range(81))
+        rng.shuffle(order)
+
+    removed = 0
+    for idx in order:
+        if removed >= cells_to_remove:
+            break
+        d = state.cells[idx]
+        if not d:
+            continue
+        state.clear(idx)
+        if state.count_solutions(2) == 1:
+            removed += 1
+        else:
+            state.place(idx, d)
+    return state.to_grid()
+
+
+def generate_puzzle(solution, difficulty, rng=random):
+    return dig_puzzle(solution, CELLS_TO_REMOVE[difficulty], rng=rng)
+
+
+def quick_puzzle(difficulty, rng=random):
+    # One dig of a shuffled grid, no grading: for the game loop when the
+    # pool is empty. make_puzzle's grading and retries cost p50 ~60 ms and
+    # p99 ~200 ms for Hard; a single dig at the old hole counts stays
+    # well under the 50 ms load_puzzle budget.
+    solution = shuffled_solution(rng)
+    return dig_puzzle(solution, UNGRADED_CELLS_TO_REMOVE[difficulty], rng=rng), solution
+
+
+def make_puzzle(difficulty, rng=random, attempts=MAX_ATTEMPTS):
+    # Fresh (puzzle, solution) pair whose technique grade matches
+    # `difficulty`, or the closest of `attempts` tries. Module-level so
+    # process pools can pickle it by reference.
+    labels = list(DIFFICULTY_LEVELS)
+    target = labels.index(difficulty)
+    best = None
+    seed = random_solution(rng)
+    for _ in range(attempts):
+        solution = shuffled_solution(rng, seed)
+        puzzle = dig_puzzle(solution, CELLS_TO_REMOVE[difficulty], rng=rng)
+        gap = abs(labels.index(difficulty_of(grade(puzzle))) - target)
+        if best is None or gap < best[0]:
+            best = (gap, puzzle, solution)
+        if not gap:
+            break
+    return best[1], best[2]
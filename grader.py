@@ -0,0 +1,290 @@
+# grader.py
+# Difficulty grading by the human techniques a puzzle needs.
+#
+# The grader solves with a ladder of techniques, always retrying the easiest
+# one after any progress, and records the hardest rung it had to climb.
+# Candidates are kept as per-cell bitmasks (bit d => digit d still possible)
+# and updated incrementally as digits are placed or eliminated.
+
+import functools
+from collections import namedtuple
+from itertools import combinations
+
+from fast_solver import ALL, BIT_DIGIT, BOX_OF, COL_OF, POPCOUNT, ROW_OF, UNITS, BitBoard
+
+# (name, weight per application); the index is the technique level
+TECHNIQUES = [
+    ("Naked single", 1),
+    ("Hidden single", 2),
+    ("Locked candidates", 5),
+    ("Naked pair", 8),
+    ("Hidden pair", 10),
+    ("Naked triple", 12),
+    ("Hidden triple", 15),
+    ("X-Wing", 20),
+    ("Swordfish", 30),
+    ("XY-Chain", 40),
+    ("Trial and error", 100),
+]
+GUESS = len(TECHNIQUES) - 1
+
+# Highest technique level allowed for each difficulty label
+DIFFICULTY_LEVELS = {"Easy": 0, "Medium": 6, "Hard": GUESS}
+
+Grade = namedtuple("Grade", "technique level score steps")
+
+PEERS = [sorted({i for u in (ROW_OF[idx], 9 + COL_OF[idx], 18 + BOX_OF[idx]) for i in UNITS[u]} - {idx})
+         for idx in range(81)]
+PEER_SETS = [set(p) for p in PEERS]
+
+MAX_CHAIN = 6
+
+
+def _bits(mask):
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        yield bit
+
+
+class _Candidates:
+
+    def __init__(self, board):
+        state = BitBoard(board)
+        self.valid = state.valid
+        self.cells = state.cells[:]
+        self.cand = [0 if state.cells[i] else state.candidates(i) for i in range(81)]
+
+    def place(self, idx, d):
+        bit = 1 << d
+        self.cells[idx] = d
+        self.cand[idx] = 0
+        cand = self.cand
+        for p in PEERS[idx]:
+            cand[p] &= ~bit
+
+    def eliminate(self, cells, mask):
+        # Remove `mask` from every cell in `cells`; True if anything changed.
+        changed = False
+        cand = self.cand
+        for idx in cells:
+            if cand[idx] & mask:
+                cand[idx] &= ~mask
+                changed = True
+        return changed
+
+    def solved(self):
+        return all(self.cells)
+
+    def broken(self):
+        cells, cand = self.cells, self.cand
+        return any(not cells[i] and not cand[i] for i in range(81))
+
+
+def _naked_single(g):
+    for idx in range(81):
+        m = g.cand[idx]
+        if m and POPCOUNT[m] == 1:
+            g.place(idx, BIT_DIGIT[m])
+            return True
+    return False
+
+
+def _hidden_single(g):
+    cand = g.cand
+    for unit in UNITS:
+        once = twice = 0
+        for idx in unit:
+            m = cand[idx]
+            twice |= once & m
+            once |= m
+        hidden = once & ~twice
+        if hidden:
+            bit = hidden & -hidden
+            for idx in unit:
+                if cand[idx] & bit:
+                    g.place(idx, BIT_DIGIT[bit])
+                    return True
+    return False
+
+
+def _locked_candidates(g):
+    cand = g.cand
+    for u, unit in enumerate(UNITS):
+        for bit in _bits(ALL):
+            holders = [idx for idx in unit if cand[idx] & bit]
+            if len(holders) < 2:
+                continue
+            if u >= 18:
+                # pointing: a box's candidates for this digit share a line
+                lines = []
+                if len({ROW_OF[i] for i in holders}) == 1:
+                    lines.append(UNITS[ROW_OF[holders[0]]])
+                if len({COL_OF[i] for i in holders}) == 1:
+                    lines.append(UNITS[9 + COL_OF[holders[0]]])
+                for line in lines:
+                    if g.eliminate([i for i in line if BOX_OF[i] != u - 18], bit):
+                        return True
+            elif len({BOX_OF[i] for i in holders}) == 1:
+                # claiming: a line's candidates sit inside one box
+                box = UNITS[18 + BOX_OF[holders[0]]]
+                if g.eliminate([i for i in box if i not in unit], bit):
+                    return True
+    return False
+
+
+def _naked_subset(g, n):
+    cand = g.cand
+    for unit in UNITS:
+        small = [idx for idx in unit if 2 <= POPCOUNT[cand[idx]] <= n]
+        if len(small) < n:
+            continue
+        for group in combinations(small, n):
+            union = 0
+            for idx in group:
+                union |= cand[idx]
+            if POPCOUNT[union] == n:
+                if g.eliminate([i for i in unit if i not in group], union):
+                    return True
+    return False
+
+
+def _hidden_subset(g, n):
+    cand = g.cand
+    for unit in UNITS:
+        where = {}
+        for bit in _bits(ALL):
+            holders = [idx for idx in unit if cand[idx] & bit]
+            if 2 <= len(holders) <= n:
+                where[bit] = holders
+        if len(where) < n:
+            continue
+        for digits in combinations(where, n):
+            cells = set()
+            mask = 0
+            for bit in digits:
+                cells.update(where[bit])
+                mask |= bit
+            if len(cells) == n:
+                if g.eliminate(cells, ALL & ~mask):
+                    return True
+    return False
+
+
+def _fish(g, n):
+    cand = g.cand
+    for bit in _bits(ALL):
+        for base, cover, pos in ((0, 9, COL_OF), (9, 0, ROW_OF)):
+            lines = {}
+            for u in range(base, base + 9):
+                spots = {pos[idx] for idx in UNITS[u] if cand[idx] & bit}
+                if 2 <= len(spots) <= n:
+                    lines[u] = spots
+            if len(lines) < n:
+                continue
+            for group in combinations(lines, n):
+                spots = set()
+                for u in group:
+                    spots |= lines[u]
+                if len(spots) != n:
+                    continue
+                rest = [idx for s in spots for idx in UNITS[cover + s]
+                        if all(idx not in UNITS[u] for u in group)]
+                if g.eliminate(rest, bit):
+                    return True
+    return False
+
+
+def _xy_chain(g):
+    # Chains of bivalue cells: if the start is not `a`, every link forces the
+    # next cell, and a chain that ends forcing `a` means any cell seeing both
+    # ends cannot be `a`.
+    cand = g.cand
+    bivalue = [idx for idx in range(81) if POPCOUNT[cand[idx]] == 2]
+    if len(bivalue) < 2:
+        return False
+    bi = set(bivalue)
+    for start in bivalue:
+        for a in _bits(cand[start]):
+            stack = [(start, cand[start] ^ a, (start,))]
+            while stack:
+                cell, out, path = stack.pop()
+                if out == a and len(path) > 1:
+                    targets = [i for i in PEER_SETS[start] & PEER_SETS[cell] if i not in path]
+                    if g.eliminate(targets, a):
+                        return True
+                if len(path) >= MAX_CHAIN:
+                    continue
+                for nxt in PEERS[cell]:
+                    if nxt in bi and nxt not in path and cand[nxt] & out:
+                        stack.append((nxt, cand[nxt] ^ out, path + (nxt,)))
+    return False
+
+
+STEPS = [
+    _naked_single,
+    _hidden_single,
+    _locked_candidates,
+    lambda g: _naked_subset(g, 2),
+    lambda g: _hidden_subset(g, 2),
+    lambda g: _naked_subset(g, 3),
+    lambda g: _hidden_subset(g, 3),
+    lambda g: _fish(g, 2),
+    lambda g: _fish(g, 3),
+    _xy_chain,
+]
+
+
+def canonical_key(board):
+    # Digits relabelled in order of first appearance, for the grid and its
+    # transpose; the smaller string is the key. Puzzles that differ only by
+    # relabelling or transposition share a grade.
+    def relabel(cells):
+        mapping = {0: "0"}
+        out = []
+        for v in cells:
+            if v not in mapping:
+                mapping[v] = str(len(mapping))
+            out.append(mapping[v])
+        return "".join(out)
+
+    rows = [board[r][c] for r in range(9) for c in range(9)]
+    cols = [board[r][c] for c in range(9) for r in range(9)]
+    return min(relabel(rows), relabel(cols))
+
+
+def grade(board):
+    return _grade_key(canonical_key(board))
+
+
+@functools.lru_cache(maxsize=4096)
+def _grade_key(key):
+    board = [[int(ch) for ch in key[r * 9:r * 9 + 9]] for r in range(9)]
+    g = _Candidates(board)
+    if not g.valid:
+        return Grade(TECHNIQUES[GUESS][0], GUESS, TECHNIQUES[GUESS][1], 0)
+
+    hardest = 0
+    score = 0
+    steps = 0
+    while not g.solved() and not g.broken():
+        for level, step in enumerate(STEPS):
+            if step(g):
+                hardest = max(hardest, level)
+                score += TECHNIQUES[level][1]
+                steps += 1
+                break
+        else:
+            hardest = GUESS
+            score += TECHNIQUES[GUESS][1]
+            break
+    if g.broken():
+        hardest = GUESS
+    return Grade(TECHNIQUES[hardest][0], hardest, score, steps)
+
+
+def difficulty_of(result):
+    for label, level in DIFFICULTY_LEVELS.items():
+        if result.level <= level:
+            return label
+    return "Hard"
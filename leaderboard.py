@@ -0,0 +1,150 @@
+# leaderboard.py
+# Top-K best times per difficulty, all time plus today and this week.
+#
+# Each board is a sorted list of at most K (time, finished, name) entries,
+# one per user (their best in that window). A finished game is offered to
+# the boards as it is recorded: anything no faster than a full board's last
+# entry is rejected in O(1), otherwise the user's old entry is replaced in
+# O(K). Reading a board is a copy of at most K entries, however many users
+# there are.
+#
+# The boards are saved to leaderboard.json (atomic replace) so startup does
+# not scan every user. Without that file the all-time boards are rebuilt
+# once from the user store's best times; daily and weekly boards start empty.
+# Like the user stores, it can hand its writes to a persister.WriteBehind.
+#
+# Days and weeks are local time; weeks are ISO weeks (Monday to Sunday).
+
+import bisect
+import datetime
+import json
+import threading
+import time
+
+from persister import PersistedStore
+from user_store import LEVELS, write_atomic
+
+LEADERBOARD_FILE = "leaderboard.json"
+LEADERBOARD_FORMAT = "sudoku-leaderboard/1"
+WINDOWS = ("all", "daily", "weekly")
+TOP_K = 10
+
+
+def period(window, when):
+    # Which day / week `when` (epoch seconds) falls in; None for "all".
+    if window == "all":
+        return None
+    day = datetime.date.fromtimestamp(when)
+    if window == "daily":
+        return day.isoformat()
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02}"
+
+
+class Board:
+    # One window of one level.
+    __slots__ = ("k", "period", "entries")
+
+    def __init__(self, k, period=None, entries=()):
+        self.k = k
+        self.period = period
+        self.entries = sorted(tuple(e) for e in entries)[:k]
+
+    def offer(self, name, elapsed_time, finished):
+        # True if the board changed.
+        entries = self.entries
+        if len(entries) >= self.k and (elapsed_time, finished) >= entries[-1][:2]:
+            return False
+        for i, (t, _, n) in enumerate(entries):
+            if n == name:
+                if elapsed_time >= t:
+                    return False
+                del entries[i]
+                break
+        bisect.insort(entries, (elapsed_time, finished, name))
+        del entries[self.k:]
+        return True
+
+
+class Leaderboard(PersistedStore):
+
+    def __init__(self, path=LEADERBOARD_FILE, k=TOP_K):
+        self.path = path
+        self.k = k
+        self.boards = {window: {level: Board(k) for level in LEVELS} for window in WINDOWS}
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def load(self, store=None):
+        # Read the saved boards, or rebuild all-time ones from `store`.
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = None
+        if data is not None and data.get("format") == LEADERBOARD_FORMAT:
+            for window, levels in data["boards"].items():
+                for level, saved in levels.items():
+                    if window in self.boards and level in self.boards[window]:
+                        self.boards[window][level] = Board(self.k, saved["period"], saved["entries"])
+        elif store is not None:
+            self.rebuild(store)
+
+    def rebuild(self, store):
+        # All-time boards from each user's best time (store.best_times).
+        with self._lock:
+            for level in LEVELS:
+                board = self.boards["all"][level] = Board(self.k)
+                for name, best_time in store.best_times(level, self.k):
+                    board.offer(name, best_time, 0.0)
+            self._dirty = True
+        self._changed()
+
+    def record(self, username, level, elapsed_time, finished=None):
+        # Offer one won game to every window of its level.
+        if finished is None:
+            finished = time.time()
+        changed = False
+        with self._lock:
+            for window in WINDOWS:
+                board = self.boards[window][level]
+                current = period(window, finished)
+                if board.period != current:
+                    board.period, board.entries = current, []
+                    changed = True
+                changed = board.offer(username, elapsed_time, finished) or changed
+            self._dirty = self._dirty or changed
+        if changed:
+            self._changed()
+        return changed
+
+    def top(self, window, level, now=None):
+        # [(name, seconds)] fastest first; a day or week that has ended reads
+        # as empty until its next game.
+        board = self.boards[window][level]
+        if board.period != period(window, time.time() if now is None else now):
+            return []
+        return [(name, t) for t, _, name in board.entries]
+
+    # ---- persistence ----
+    def pending_count(self):
+        return 1 if self._dirty else 0
+
+    def write_pending(self):
+        with self._lock:
+            if not self._dirty:
+                return 0
+            data = json.dumps({
+                "format": LEADERBOARD_FORMAT,
+                "k": self.k,
+                "boards": {window: {level: {"period": b.period, "entries": b.entries}
+                                    for level, b in levels.items()}
+                           for window, levels in self.boards.items()},
+            }).encode()
+            self._dirty = False
+        try:
+            write_atomic(self.path, data)
+        except Exception:
+            self._dirty = True
+            raise
+        return 1
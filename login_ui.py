@@ -1,23 +1,11 @@
 import customtkinter as ctk
 import tkinter.messagebox as mb
-import json
-import os
+
+from user_store import open_user_store
 
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")
 
-USERS_FILE = "users.json"
-
-def load_users():
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f)
-
 def register_user():
     username = entry_username.get().strip()
     password = entry_password.get().strip()
@@ -31,13 +19,14 @@ def register_user():
         mb.showerror("Error", "Passwords do not match.")
         return
 
-    users = load_users()
-    if username in users:
-        mb.showerror("Error", "Username already exists.")
-        return
-
-    users[username] = password
-    save_users(users)
+    store = open_user_store()
+    try:
+        store.load()
+        if not store.register(username, password):
+            mb.showerror("Error", "Username already exists.")
+            return
+    finally:
+        store.close()
     mb.showinfo("Success", "Registration successful!")
 
 def go_back():
@@ -1,18 +1,37 @@
-import numpy as np
 import pygame
 import sys
-import random
 import time
 import copy
-import json
 import os
+import threading
+
+from animation import Sequence, Timeline, Tween, call, wait
+from board_state import BoardState
+from compositor import Compositor, OverlayPool
+from frame_profiler import FrameProfiler
+from game_log import GameLog
+from persister import WriteBehind
+from generator import CELLS_TO_REMOVE
+from leaderboard import WINDOWS as LEADERBOARD_WINDOWS, Leaderboard
+from puzzle import Puzzle
+from puzzle_bank import open_default_bank
+from puzzle_pool import PuzzlePool
+from render_cache import GradientCache, LazyFont, TextCache, preload_numpy
+from render_scheduler import RenderScheduler
+import surface_tracker
+from user_store import new_level_stats, open_user_store, time_quantiles
 
 # ---------------- Initialization ---------------- #
-pygame.init()
-try:
-    pygame.mixer.init()
-except Exception:
-    pass  # audio optional
+# Importing this module has no side effects: main() opens the window via
+# init_display(), and audio, the puzzle pool and the user file only start
+# once the first frame is on screen (see startup / after_first_frame).
+
+# Headless mode (CI, servers, render_benchmark.py): SDL's dummy video driver
+# and no audio at all, so tones and music are never set up
+HEADLESS = os.environ.get("SUDOKU_HEADLESS") == "1"
+if HEADLESS:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
 
 WIDTH, HEIGHT = 540, 600
 GRID_SIZE = 9
@@ -23,12 +42,34 @@ BOARD_SIZE = WIDTH - 2 * BOARD_MARGIN
 CELL_SIZE = BOARD_SIZE // GRID_SIZE
 BOARD_X, BOARD_Y = BOARD_MARGIN, BOARD_MARGIN
 
-FONT = pygame.font.SysFont("comicsans", 40)
-SMALL_FONT = pygame.font.SysFont("comicsans", 28)
-TINY_FONT = pygame.font.SysFont("comicsans", 22)
+# Fonts load on first use
+FONT = LazyFont("comicsans", 40)
+SMALL_FONT = LazyFont("comicsans", 28)
+TINY_FONT = LazyFont("comicsans", 22)
+
+WIN = None  # the window, created by init_display()
+
+# Only changed regions reach the display; the loop sleeps when nothing animates
+SCHEDULER = RenderScheduler(fps=60)
+SUMMARY_READY = pygame.event.custom_type()  # posted when GAME_LOG.prepare() finishes
+REDRAW_EVENTS = (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED,
+                 pygame.WINDOWSIZECHANGED, pygame.WINDOWSHOWN, pygame.WINDOWRESTORED,
+                 SUMMARY_READY)
+
+GIVEN_COLOR = (230, 235, 255)
+ENTRY_COLOR = (120, 190, 255)
+
+# Rendered text is cached; board digits are rendered once (on the first
+# puzzle, see load_puzzle) and pinned
+TEXT = TextCache(max_entries=256)
 
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Sudoku Game")
+# F3 profiler overlay; SUDOKU_TRACE=<file> also writes every frame as JSON lines
+PROFILER = FrameProfiler(alloc_count=lambda: surface_tracker.count() + TEXT.misses)
+PROFILER_FONT = LazyFont("monospace", 14)
+PROFILER_PANEL = pygame.Rect(8, 8, 300, 230)
+PROFILER_STAGES = ["draw_vertical_gradient", "draw_grid_modern", "draw_numbers_modern",
+                   "draw_chip", "compose", "events", "display.update", "other"]
+profiler_overlay = False
 
 
 WHITE = (255, 255, 255)
@@ -43,11 +84,22 @@ current_screen = "login"
 selected_cell = (-1, -1)
 grid = [[0]*9 for _ in range(9)]
 original_grid = None
+board_state = BoardState(grid)  # per-unit digit counts, kept in sync with grid
+current_puzzle = None  # Puzzle with the solution, for hints / answer checks
+puzzle_serial = 0  # bumped per loaded puzzle so cached board layers rebuild
 start_time = None
+move_count = 0  # cell changes in the current game
+used_hint = False  # H revealed a cell: the game stays off the leaderboard and best times
 selected_difficulty = None
 
 
-users = {}  # Loaded from JSON
+USERS = open_user_store()  # journal or SQLite (SUDOKU_USER_STORE), loaded in startup()
+PERSISTER = WriteBehind(USERS)  # writes user changes off the game loop
+LEADERBOARD = Leaderboard()  # top times per level, loaded along with USERS
+LEADERBOARD_PERSISTER = WriteBehind(LEADERBOARD)
+leaderboard_window = "all"
+GAME_LOG = GameLog()  # every finished game, for the History averages
+GAME_LOG_PERSISTER = WriteBehind(GAME_LOG)
 current_user = None
 active_input = "username"
 input_text = {"username": "", "password": ""}
@@ -55,12 +107,30 @@ login_message = ""
 
 
 pulse_value = 0
-pulse_direction = 1
 button_hover_alpha = {}  # key -> 0..255
 button_pressed_alpha = {}  # transient press effect
+button_drawn = {}  # key -> (hover, pressed) as last drawn, to spot changes
+flash_on = False  # phase of the completion flash
+
+# All animation runs off this, advanced by the frame delta in main()
+TIMELINE = Timeline()
+HOVER_FADE_RATE = 1080  # alpha units per second
+PRESS_FADE_RATE = 1500
+FLASH_STEP = 0.22  # seconds per on/off phase of the completion flash
+
+
+def init_display():
+    # Only what the first frame needs: video, fonts and the window
+    global WIN
+    pygame.display.init()
+    pygame.font.init()
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Sudoku Game")
+    return WIN
 
 
 def create_tone(frequency=440, duration_ms=300, volume=0.5):
+    import numpy as np  # only needed here, and slow to import
 
     sample_rate = 44100
     n_samples = int(sample_rate * (duration_ms / 1000.0))
@@ -70,27 +140,34 @@ def create_tone(frequency=440, duration_ms=300, volume=0.5):
     stereo = np.column_stack((audio, audio))
     return pygame.sndarray.make_sound(stereo)
 
-WIN_SOUND = None
-LOSE_SOUND = None
-if pygame.mixer.get_init():
-    try:
-        WIN_SOUND = create_tone(880, 300, 0.5)   # Cheerful high tone
-        LOSE_SOUND = create_tone(220, 600, 0.5)  # Low buzz
-    except Exception:
-        WIN_SOUND = None
-        LOSE_SOUND = None
+TONES = {"win": (880, 300, 0.5),   # Cheerful high tone
+         "lose": (220, 600, 0.5)}  # Low buzz
+tone_sounds = {}  # name -> Sound, or None if it could not be made
+
+def get_tone(name):
+    # Synthesised on first use (start_audio also warms them in the background)
+    if name not in tone_sounds:
+        if not pygame.mixer.get_init():
+            return None
+        try:
+            tone_sounds[name] = create_tone(*TONES[name])
+        except Exception:
+            tone_sounds[name] = None
+    return tone_sounds[name]
 
 def play_win():
-    if WIN_SOUND:
+    sound = get_tone("win")
+    if sound:
         try:
-            WIN_SOUND.play()
+            sound.play()
         except Exception:
             pass
 
 def play_lose():
-    if LOSE_SOUND:
+    sound = get_tone("lose")
+    if sound:
         try:
-            LOSE_SOUND.play()
+            sound.play()
         except Exception:
             pass
 
@@ -117,9 +194,19 @@ def try_start_bgm(path, volume=0.25):
         except Exception:
             pass
 
-
-CLICK_SOUND = safe_load_sound("click.wav")
-try_start_bgm("bgm.mp3", volume=0.18)
+def start_audio():
+    # Called once the first frame is up; never in headless mode
+    global CLICK_SOUND
+    if HEADLESS:
+        return
+    try:
+        pygame.mixer.init()
+    except Exception:
+        return  # audio optional
+    CLICK_SOUND = safe_load_sound("click.wav")
+    try_start_bgm("bgm.mp3", volume=0.18)
+    threading.Thread(target=lambda: [get_tone(name) for name in TONES],
+                     name="tone-warmup", daemon=True).start()
 
 def play_click():
     if CLICK_SOUND:
@@ -129,69 +216,65 @@ def play_click():
             pass
 
 
+users_loader = None  # thread running load_users() during startup
+
 def load_users():
-    global users
-    try:
-        with open("users.json", "r") as f:
-            content = f.read().strip()
-            if content:
-                users = json.loads(content)
-            else:
-                users = {}
-    except FileNotFoundError:
-        users = {}
-
-
-    for user, data in users.items():
-        if "stats" not in data:
-            data["stats"] = {
-                "Easy": {"played": 0, "won": 0, "lost": 0, "best_time": None},
-                "Medium": {"played": 0, "won": 0, "lost": 0, "best_time": None},
-                "Hard": {"played": 0, "won": 0, "lost": 0, "best_time": None}
-            }
-        else:
-            for level in ["Easy", "Medium", "Hard"]:
-                if level not in data["stats"]:
-                    data["stats"][level] = {"played": 0, "won": 0, "lost": 0, "best_time": None}
+    USERS.load()
+    LEADERBOARD.load(USERS)  # rebuilds from USERS only if leaderboard.json is missing
 
-def save_users():
-    with open("users.json", "w") as f:
-        json.dump(users, f)
+def load_users_async():
+    global users_loader
+    users_loader = threading.Thread(target=load_users, name="load-users", daemon=True)
+    users_loader.start()
 
-load_users()
-save_users()
+def wait_for_users():
+    # Anything reading or writing USERS calls this first
+    if users_loader is not None and users_loader is not threading.current_thread():
+        users_loader.join()
 
 
 def draw_text_centered(surface, text, y, font, color=BLACK):
-    rendered = font.render(text, True, color)
+    rendered = TEXT.render(font, text, color)
     surface.blit(rendered, (WIDTH//2 - rendered.get_width()//2, y))
 
+def text_band(y, font):
+    # Full-width strip covering a line drawn by draw_text_centered
+    return pygame.Rect(0, y, WIDTH, font.get_linesize())
+
+GRADIENTS = GradientCache(max_entries=16)  # built once per colour pair, then blitted
+
+@PROFILER.timed("draw_vertical_gradient")
 def draw_vertical_gradient(surface, top_rgb, bottom_rgb):
-    r1, g1, b1 = top_rgb
-    r2, g2, b2 = bottom_rgb
-    for i in range(HEIGHT):
-        t = i / max(1, HEIGHT-1)
-        r = int(r1 + (r2 - r1) * t)
-        g = int(g1 + (g2 - g1) * t)
-        b = int(b1 + (b2 - b1) * t)
-        pygame.draw.line(surface, (r, g, b), (0, i), (WIDTH, i))
+    surface.blit(GRADIENTS.get(top_rgb, bottom_rgb, surface.get_size()), (0, 0))
 
 def update_pulse(speed=2, max_amp=40):
-    global pulse_value, pulse_direction
-    pulse_value += pulse_direction * speed
-    if pulse_value > max_amp or pulse_value < 0:
-        pulse_direction *= -1
+    # `speed` is in units per 60 Hz frame, as before; the value now follows
+    # the timeline clock so it runs at the same rate at any frame rate
+    global pulse_value
+    pulse_value = TIMELINE.pulse(speed * 60, max_amp)
     return pulse_value
 
-def draw_chip(text, pos, bg=(30, 30, 50), fg=(230, 230, 255)):
+def fade_to(store, key, target, rate, tag):
+    # Tween store[key] towards target at `rate` units/second, unless a fade
+    # to that target is already running
+    running = TIMELINE.get((tag, key))
+    if store[key] == target or (running is not None and running.end == target):
+        return
+    TIMELINE.play(Tween(store[key], target, abs(target - store[key]) / rate,
+                        lambda v: store.__setitem__(key, int(v))), key=(tag, key))
+
+@PROFILER.timed("draw_chip")
+def draw_chip(text, pos, bg=(30, 30, 50), fg=(230, 230, 255), surface=None):
+    if surface is None:
+        surface = WIN
     pad_x, pad_y = 10, 6
-    surf = TINY_FONT.render(text, True, fg)
+    surf = TEXT.render(TINY_FONT, text, fg)
     rect = surf.get_rect()
     rect.topleft = (pos[0] + pad_x, pos[1] + pad_y)
     box = pygame.Rect(pos[0], pos[1], rect.width + pad_x*2, rect.height + pad_y*2)
-    pygame.draw.rect(WIN, bg, box, border_radius=12)
-    pygame.draw.rect(WIN, (255, 255, 255), box, 1, border_radius=12)
-    WIN.blit(surf, rect.topleft)
+    pygame.draw.rect(surface, bg, box, border_radius=12)
+    pygame.draw.rect(surface, (255, 255, 255), box, 1, border_radius=12)
+    surface.blit(surf, rect.topleft)
 
 def draw_button(surface, rect, text, key, base_color=(60, 120, 200), hover_color=(110, 180, 255), text_color=(255, 255, 255)):
     # Hover alpha
@@ -201,10 +284,8 @@ def draw_button(surface, rect, text, key, base_color=(60, 120, 200), hover_color
         button_pressed_alpha[key] = 0
 
     mouse_pos = pygame.mouse.get_pos()
-    if rect.collidepoint(mouse_pos):
-        button_hover_alpha[key] = min(255, button_hover_alpha[key] + 18)
-    else:
-        button_hover_alpha[key] = max(0, button_hover_alpha[key] - 18)
+    target = 255 if rect.collidepoint(mouse_pos) else 0
+    fade_to(button_hover_alpha, key, target, HOVER_FADE_RATE, "hover")
 
 
     ha = button_hover_alpha[key]
@@ -214,8 +295,10 @@ def draw_button(surface, rect, text, key, base_color=(60, 120, 200), hover_color
     color = (r, g, b)
 
 
-    if button_pressed_alpha[key] > 0:
-        button_pressed_alpha[key] = max(0, button_pressed_alpha[key] - 25)
+    drawn = (button_hover_alpha[key], button_pressed_alpha[key])
+    if surface is WIN and button_drawn.get(key) != drawn:
+        button_drawn[key] = drawn
+        SCHEDULER.invalidate(rect)
 
     pygame.draw.rect(surface, color, rect, border_radius=14)
     pygame.draw.rect(surface, (255, 255, 255), rect, 2, border_radius=14)
@@ -223,17 +306,18 @@ def draw_button(surface, rect, text, key, base_color=(60, 120, 200), hover_color
 
     if button_pressed_alpha[key] > 0:
         alpha = button_pressed_alpha[key]
-        overlay = pygame.Surface((rect.width, rect.height), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, alpha // 2))
+        overlay = OVERLAYS.get(rect.size, (255, 255, 255, alpha // 2))
         surface.blit(overlay, rect.topleft)
 
-    txt = SMALL_FONT.render(text, True, text_color)
+    txt = TEXT.render(SMALL_FONT, text, text_color)
     surface.blit(txt, (rect.x + (rect.width - txt.get_width()) // 2,
                        rect.y + (rect.height - txt.get_height()) // 2))
 
 def press_button(key):
 
     button_pressed_alpha[key] = 200
+    TIMELINE.play(Tween(200, 0, 200 / PRESS_FADE_RATE,
+                        lambda v: button_pressed_alpha.__setitem__(key, int(v))), key=("press", key))
     play_click()
 
 def get_elapsed_time():
@@ -244,135 +328,80 @@ def get_elapsed_time():
     seconds = elapsed % 60
     return f"{minutes:02}:{seconds:02}"
 
+def ms_until_timer_tick():
+    # How long the game screen can sleep before the timer chip changes
+    if start_time is None:
+        return SCHEDULER.idle_timeout_ms
+    return 1000 - int((time.time() - start_time) * 1000) % 1000
+
 def update_stats(user, level, won, elapsed_time=0):
-    stats = users[user]["stats"][level]
-    stats["played"] += 1
-    if won:
-        stats["won"] += 1
-        if stats.get("best_time") is None or elapsed_time < stats["best_time"]:
-            stats["best_time"] = elapsed_time
-    else:
-        stats["lost"] += 1
-    save_users()
-
-
-def is_valid(board, row, col, num):
-    for i in range(9):
-        if board[row][i] == num or board[i][col] == num:
-            return False
-    start_row, start_col = 3*(row//3), 3*(col//3)
-    for i in range(start_row,start_row+3):
-        for j in range(start_col,start_col+3):
-            if board[i][j]==num:
-                return False
-    return True
-
-def solve_board(board):
-    for i in range(9):
-        for j in range(9):
-            if board[i][j]==0:
-                nums = list(range(1,10))
-                random.shuffle(nums)
-                for num in nums:
-                    if is_valid(board,i,j,num):
-                        board[i][j]=num
-                        if solve_board(board):
-                            return True
-                        board[i][j]=0
-                return False
-    return True
-
-def fill_diagonal_boxes(board):
-    for i in range(0,9,3):
-        fill_box(board,i,i)
-
-def fill_box(board,row_start,col_start):
-    nums = list(range(1,10))
-    random.shuffle(nums)
-    idx=0
-    for i in range(3):
-        for j in range(3):
-            board[row_start+i][col_start+j]=nums[idx]
-            idx+=1
-
-def remove_cells(board,difficulty):
-    levels = {"Easy":35,"Medium":45,"Hard":55}
-    cells_to_remove = levels[difficulty]
-    puzzle = copy.deepcopy(board)
-    count=0
-    while count<cells_to_remove:
-        i=random.randint(0,8)
-        j=random.randint(0,8)
-        if puzzle[i][j]!=0:
-            puzzle[i][j]=0
-            count+=1
-    return puzzle
-
-def generate_full_board():
-    board = [[0]*9 for _ in range(9)]
-    fill_diagonal_boxes(board)
-    solve_board(board)
-    return board
+    # One journal record per game instead of rewriting every user's data,
+    # plus the game itself in GAME_LOG
+    wait_for_users()
+    USERS.record_result(user, level, won, elapsed_time, used_hint)
+    GAME_LOG.append(user, level, current_puzzle.digest, elapsed_time, won, move_count, used_hint)
+    if won and not used_hint:
+        LEADERBOARD.record(user, level, elapsed_time)
+
+
+# Puzzles are pre-generated on a background thread; load_puzzle only pops one
+PUZZLE_POOL = PuzzlePool(list(CELLS_TO_REMOVE), depth=3, low_water=1)
+# Optional pre-built bank (puzzle_bank.py build); preferred over generating
+PUZZLE_BANK = None  # opened by after_first_frame()
 
 def load_puzzle(difficulty):
-    global grid, original_grid, start_time
-    full_board = generate_full_board()
-    grid = remove_cells(full_board,difficulty)
+    global grid, original_grid, start_time, board_state, current_puzzle, puzzle_serial, move_count, used_hint
+    # A bank record without a stored solution is solved here; one that
+    # turns out unsolvable is skipped in favour of the pool
+    puzzle = None
+    banked = PUZZLE_BANK.random(difficulty) if PUZZLE_BANK else None
+    if banked:
+        givens, full_board = banked
+        if full_board is None:
+            puzzle = Puzzle.from_givens(givens, difficulty)
+        else:
+            puzzle = Puzzle(givens, full_board, difficulty)
+    if puzzle is None:
+        givens, full_board = PUZZLE_POOL.get(difficulty)
+        puzzle = Puzzle(givens, full_board, difficulty)
+    current_puzzle = puzzle
+    grid = [row[:] for row in puzzle.givens]
     original_grid = copy.deepcopy(grid)
+    board_state = BoardState(grid)
+    TEXT.prerender(FONT, [str(d) for d in range(1, 10)], [GIVEN_COLOR, ENTRY_COLOR])
+    puzzle_serial += 1
+    move_count = 0
+    used_hint = False
     start_time = time.time()
 
-def is_board_complete_and_valid(board):
-    for row in board:
-        if 0 in row:
-            return False
-    for i in range(9):
-        if len(set(board[i]))!=9 or len(set([board[j][i] for j in range(9)]))!=9:
-            return False
-    for br in range(3):
-        for bc in range(3):
-            nums=[]
-            for i in range(br*3,br*3+3):
-                for j in range(bc*3,bc*3+3):
-                    nums.append(board[i][j])
-            if len(set(nums))!=9:
-                return False
-    return True
-
-def conflicts_at(board, r, c, val):
-
-    if val == 0:
-        return []
-    bad = []
-
-    for j in range(9):
-        if j != c and board[r][j] == val:
-            bad.append((r, j))
-
-    for i in range(9):
-        if i != r and board[i][c] == val:
-            bad.append((i, c))
-
-    sr, sc = 3*(r//3), 3*(c//3)
-    for i in range(sr, sr+3):
-        for j in range(sc, sc+3):
-            if (i, j) != (r, c) and board[i][j] == val:
-                bad.append((i, j))
-
-    if bad:
-        bad.append((r, c))
-    return bad
-
-def flash_completed_board():
+def set_cell(row, col, value):
+    global move_count
+    if grid[row][col] != value:
+        move_count += 1
+    grid[row][col] = value
+    board_state.set(row, col, value)
+
+def flash_completed_board(on_done):
+    # Three on/off flashes of the solved board played on the timeline, so
+    # input keeps being handled; cancel "flash" with finish=True to skip
+    def show(on):
+        global flash_on
+        flash_on = on
+        SCHEDULER.invalidate()
+    steps = []
     for _ in range(3):
+        steps += [call(lambda: show(True)), wait(FLASH_STEP),
+                  call(lambda: show(False)), wait(FLASH_STEP)]
+    TIMELINE.play(Sequence(steps, on_done=on_done), key="flash")
+
+def draw_flash_frame():
+    if flash_on:
         draw_vertical_gradient(WIN, (20, 60, 90), (10, 20, 40))
         draw_grid_modern()
         draw_numbers_modern()
-        pygame.display.update()
-        pygame.time.delay(220)
+    else:
         draw_vertical_gradient(WIN, (10, 20, 40), (20, 60, 90))
         draw_grid_modern()
-        pygame.display.update()
-        pygame.time.delay(220)
 
 
 def move_to_next_editable_cell(row, col):
@@ -386,67 +415,91 @@ def move_to_next_editable_cell(row, col):
             return (nr, nc)
     return (row, col)
 
-def draw_grid_modern():
-
+@PROFILER.timed("draw_grid_modern")
+def draw_board_panel(surface):
     panel = pygame.Rect(BOARD_X, BOARD_Y, BOARD_SIZE, BOARD_SIZE)
-    pygame.draw.rect(WIN, (24, 28, 48), panel, border_radius=18)
-    pygame.draw.rect(WIN, (255, 255, 255), panel, 2, border_radius=18)
-
+    pygame.draw.rect(surface, (24, 28, 48), panel, border_radius=18)
+    pygame.draw.rect(surface, (255, 255, 255), panel, 2, border_radius=18)
 
+@PROFILER.timed("draw_grid_modern")
+def draw_line_highlight(surface):
     if selected_cell != (-1, -1):
         sr, sc = selected_cell
         # row & col soft highlight
-        row_rect = pygame.Rect(BOARD_X, BOARD_Y + sr*CELL_SIZE, BOARD_SIZE, CELL_SIZE)
-        col_rect = pygame.Rect(BOARD_X + sc*CELL_SIZE, BOARD_Y, CELL_SIZE, BOARD_SIZE)
-        row_overlay = pygame.Surface((row_rect.width, row_rect.height), pygame.SRCALPHA)
-        col_overlay = pygame.Surface((col_rect.width, col_rect.height), pygame.SRCALPHA)
-        row_overlay.fill((80, 120, 180, 35))
-        col_overlay.fill((80, 120, 180, 35))
-        WIN.blit(row_overlay, row_rect.topleft)
-        WIN.blit(col_overlay, col_rect.topleft)
-
+        surface.blit(OVERLAYS.get((BOARD_SIZE, CELL_SIZE), (80, 120, 180, 35)), (BOARD_X, BOARD_Y + sr*CELL_SIZE))
+        surface.blit(OVERLAYS.get((CELL_SIZE, BOARD_SIZE), (80, 120, 180, 35)), (BOARD_X + sc*CELL_SIZE, BOARD_Y))
 
+@PROFILER.timed("draw_grid_modern")
+def draw_grid_lines(surface):
     for i in range(GRID_SIZE+1):
         lw = 3 if i%3 == 0 else 1
         color = (170, 180, 210) if i%3 == 0 else (90, 100, 130)
         # horizontal
         y = BOARD_Y + i*CELL_SIZE
-        pygame.draw.line(WIN, color, (BOARD_X, y), (BOARD_X + BOARD_SIZE, y), lw)
+        pygame.draw.line(surface, color, (BOARD_X, y), (BOARD_X + BOARD_SIZE, y), lw)
         # vertical
         x = BOARD_X + i*CELL_SIZE
-        pygame.draw.line(WIN, color, (x, BOARD_Y), (x, BOARD_Y + BOARD_SIZE), lw)
-
+        pygame.draw.line(surface, color, (x, BOARD_Y), (x, BOARD_Y + BOARD_SIZE), lw)
 
+@PROFILER.timed("draw_grid_modern")
+def draw_selection_pulse(surface):
     if selected_cell != (-1, -1):
         sr, sc = selected_cell
         p = update_pulse(speed=3, max_amp=30)
         glow = 120 + p  # 120..150
         rect = pygame.Rect(BOARD_X + sc*CELL_SIZE, BOARD_Y + sr*CELL_SIZE, CELL_SIZE, CELL_SIZE)
-        pygame.draw.rect(WIN, (60, glow, 220), rect, 3, border_radius=8)
+        pygame.draw.rect(surface, (60, glow, 220), rect, 3, border_radius=8)
 
-def draw_numbers_modern():
+@PROFILER.timed("draw_numbers_modern")
+def draw_digits(surface, givens):
+    # givens=True draws the puzzle's clues, False the player's entries
     for r in range(GRID_SIZE):
         for c in range(GRID_SIZE):
             num = grid[r][c]
-            if num != 0:
-                base_color = (230, 235, 255) if original_grid[r][c] != 0 else (120, 190, 255)
-                text = FONT.render(str(num), True, base_color)
+            if num != 0 and (original_grid[r][c] != 0) == givens:
+                text = TEXT.render(FONT, str(num), GIVEN_COLOR if givens else ENTRY_COLOR)
                 text_rect = text.get_rect(center=(BOARD_X + c * CELL_SIZE + CELL_SIZE // 2,
                                                   BOARD_Y + r * CELL_SIZE + CELL_SIZE // 2))
-                WIN.blit(text, text_rect)
-
+                surface.blit(text, text_rect)
 
+@PROFILER.timed("draw_numbers_modern")
+def draw_conflicts(surface):
     if selected_cell != (-1, -1):
         r, c = selected_cell
-        val = grid[r][c]
-        confs = conflicts_at(grid, r, c, val)
-        if confs:
-            for (rr, cc) in confs:
-                rect = pygame.Rect(BOARD_X + cc * CELL_SIZE, BOARD_Y + rr * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-                overlay = pygame.Surface((CELL_SIZE, CELL_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(overlay, (255, 70, 70, 80), overlay.get_rect(), border_radius=8)
-                WIN.blit(overlay, rect.topleft)
+        overlay = OVERLAYS.get((CELL_SIZE, CELL_SIZE), (255, 70, 70, 80), border_radius=8)
+        for (rr, cc) in board_state.conflicts_at(r, c):
+            surface.blit(overlay, (BOARD_X + cc * CELL_SIZE, BOARD_Y + rr * CELL_SIZE))
 
+def draw_hud(surface):
+    # HUD: timer + difficulty
+    draw_chip("Time: " + get_elapsed_time(), (WIDTH-160, 560), bg=(30,30,50), surface=surface)
+    if selected_difficulty:
+        draw_chip(f"Difficulty: {selected_difficulty}", (12, 560), bg=(30,30,50), surface=surface)
+
+def draw_grid_modern():
+    draw_board_panel(WIN)
+    draw_line_highlight(WIN)
+    draw_grid_lines(WIN)
+    draw_selection_pulse(WIN)
+
+def draw_numbers_modern():
+    draw_digits(WIN, True)
+    draw_digits(WIN, False)
+    draw_conflicts(WIN)
+
+
+# Game screen layers, each redrawn only when its key (see draw_game) changes
+OVERLAYS = OverlayPool()
+GAME_BG = ((14, 20, 36), (6, 10, 18))
+GAME_LAYERS = Compositor((WIDTH, HEIGHT))
+GAME_LAYERS.add_layer("background", lambda surf: draw_vertical_gradient(surf, *GAME_BG), opaque=True)
+GAME_LAYERS.add_layer("panel", draw_board_panel)
+GAME_LAYERS.add_layer("highlight", draw_line_highlight)
+GAME_LAYERS.add_layer("grid", draw_grid_lines)
+GAME_LAYERS.add_layer("givens", lambda surf: draw_digits(surf, True))
+GAME_LAYERS.add_layer("entries", lambda surf: draw_digits(surf, False))
+GAME_LAYERS.add_layer("conflicts", draw_conflicts)
+GAME_LAYERS.add_layer("hud", draw_hud)
 
 
 def draw_login_screen():
@@ -455,6 +508,7 @@ def draw_login_screen():
     update_pulse(2, 40)
     title_color = (255, 215 - pulse_value // 2, 0)
     draw_text_centered(WIN, "Sudoku Login / Register", 44, FONT, title_color)
+    SCHEDULER.invalidate(text_band(44, FONT))
 
     username_box = pygame.Rect(WIDTH//2-140, 130, 280, 54)
     password_box = pygame.Rect(WIDTH//2-140, 210, 280, 54)
@@ -467,9 +521,11 @@ def draw_login_screen():
         pygame.draw.rect(WIN, (50, 50, 90), box, border_radius=12)
         border_col = (100 + (pulse_value*3) % 155, 200, 255) if active else (200, 200, 200)
         pygame.draw.rect(WIN, border_col, box, 3, border_radius=12)
+        if active:
+            SCHEDULER.invalidate(box)
 
         value = input_text[keyname] if keyname == "username" else "*"*len(input_text["password"])
-        txt_surface = SMALL_FONT.render(value, True, (255, 255, 255))
+        txt_surface = TEXT.render(SMALL_FONT, value, (255, 255, 255))
         WIN.blit(txt_surface, (box.x + 10, box.y + 12))
 
     draw_text_centered(WIN, "Username", 100, SMALL_FONT, (180, 200, 255))
@@ -486,7 +542,6 @@ def draw_login_screen():
 
     draw_text_centered(WIN, "TAB to switch fields • ENTER to submit", 560, TINY_FONT, (200, 200, 220))
 
-    pygame.display.update()
     return username_box, password_box, login_btn, reg_btn
 
 def draw_menu():
@@ -494,6 +549,7 @@ def draw_menu():
     update_pulse(2, 40)
     title_color = (200, 200 - pulse_value // 2, 255)
     draw_text_centered(WIN, "Select Difficulty", 48, FONT, title_color)
+    SCHEDULER.invalidate(text_band(48, FONT))
 
     buttons={}
     levels = ["Easy", "Medium", "Hard"]
@@ -504,47 +560,141 @@ def draw_menu():
         draw_button(WIN, btn, level, f"menu_{level}", base_color=base, hover_color=hover)
         buttons[level]=btn
 
-    history_btn = pygame.Rect(WIDTH//2-90, 430, 180, 50)
+    history_btn = pygame.Rect(WIDTH//2-190, 430, 180, 50)
     draw_button(WIN, history_btn, "History", "menu_history", base_color=(80, 100, 180), hover_color=(130, 160, 240))
     buttons["History"]=history_btn
+    leaderboard_btn = pygame.Rect(WIDTH//2+10, 430, 180, 50)
+    draw_button(WIN, leaderboard_btn, "Leaderboard", "menu_leaderboard", base_color=(180, 140, 60), hover_color=(235, 190, 90))
+    buttons["Leaderboard"]=leaderboard_btn
 
 
     if current_user:
         draw_chip(f"User: {current_user}", (12, 560), bg=(36,36,60))
 
-    pygame.display.update()
     return buttons
 
+def format_seconds(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 60:02}:{seconds % 60:02}"
+
+def prepare_history(username):
+    # Read the user's game log on a background thread; the History screen
+    # is redrawn when it is done
+    GAME_LOG.prepare(username, on_ready=lambda: pygame.event.post(pygame.event.Event(SUMMARY_READY)))
+
 def draw_history_screen(username):
+    # Totals, percentiles and the rolling average come from USERS (they
+    # include games from before GAME_LOG existed); the overall average and
+    # moves from GAME_LOG's cached per-user summary, once prepare_history()
+    # has built it
+    wait_for_users()
     draw_vertical_gradient(WIN, (20, 20, 44), (8, 8, 20))
     draw_text_centered(WIN, f"{username}'s History", 40, FONT, (220, 220, 255))
+    logged = GAME_LOG.summary(username)
     y_start = 120
     for level in ["Easy", "Medium", "Hard"]:
-        stats = users[username]["stats"].get(level, {"played":0,"won":0,"lost":0,"best_time":None})
+        stats = USERS.get_stats(username).get(level, new_level_stats())
         draw_text_centered(WIN, f"{level}", y_start, SMALL_FONT, (200, 210, 255))
         draw_text_centered(WIN, f"Played: {stats['played']}  •  Won: {stats['won']}  •  Lost: {stats['lost']}", y_start+26, TINY_FONT, (230,230,240))
         best_time = stats.get("best_time")
         if best_time is not None:
-            minutes = best_time // 60
-            seconds = best_time % 60
-            draw_text_centered(WIN, f"Best Time: {minutes:02}:{seconds:02}", y_start+48, TINY_FONT, (180,200,255))
+            median, p90 = time_quantiles(stats)
+            times = f"Best: {format_seconds(best_time)}"
+            if median is not None:
+                times += f"  •  Median: {format_seconds(median)}  •  p90: {format_seconds(p90)}"
+            draw_text_centered(WIN, times, y_start+48, TINY_FONT, (180,200,255))
+        summary = logged[level] if logged is not None else None
+        averages = []
+        if summary is not None and summary.avg_time is not None:
+            averages.append(f"Avg: {format_seconds(summary.avg_time)}")
+        if stats.get("avg_time") is not None:
+            averages.append(f"Rolling: {format_seconds(stats['avg_time'])}")
+        if summary is not None and summary.played:
+            averages.append(f"Moves: {summary.avg_moves:.0f}")
+        if averages:
+            draw_text_centered(WIN, "  •  ".join(averages), y_start+70, TINY_FONT, (160,180,230))
         y_start += 110
     draw_text_centered(WIN, "Press ESC to return", 550, TINY_FONT, (210, 210, 230))
-    pygame.display.update()
-
-def draw_game():
-    # BG
-    draw_vertical_gradient(WIN, (14, 20, 36), (6, 10, 18))
-    # Board
-    draw_grid_modern()
-    draw_numbers_modern()
 
-    # HUD: timer + difficulty
-    draw_chip("Time: " + get_elapsed_time(), (WIDTH-160, 560), bg=(30,30,50))
-    if selected_difficulty:
-        draw_chip(f"Difficulty: {selected_difficulty}", (12, 560), bg=(30,30,50))
+LEADERBOARD_TITLES = {"all": "All Time", "daily": "Today", "weekly": "This Week"}
+
+def draw_leaderboard_screen(window):
+    # Reads LEADERBOARD's top-K lists only, never the user store
+    wait_for_users()
+    draw_vertical_gradient(WIN, (40, 28, 12), (12, 8, 4))
+    draw_text_centered(WIN, "Leaderboard", 30, FONT, (255, 225, 160))
+    draw_text_centered(WIN, f"< {LEADERBOARD_TITLES[window]} >", 82, SMALL_FONT, (240, 210, 150))
+    col_w = WIDTH // 3
+    now = time.time()
+    for idx, level in enumerate(["Easy", "Medium", "Hard"]):
+        x = idx * col_w
+        title = TEXT.render(SMALL_FONT, level, (200, 210, 255))
+        WIN.blit(title, (x + (col_w - title.get_width()) // 2, 135))
+        entries = LEADERBOARD.top(window, level, now)
+        if not entries:
+            empty = TEXT.render(TINY_FONT, "no wins yet", (150, 150, 170))
+            WIN.blit(empty, (x + (col_w - empty.get_width()) // 2, 180))
+        for rank, (name, best_time) in enumerate(entries, 1):
+            y = 175 + (rank - 1) * 34
+            color = (255, 215, 90) if rank == 1 else (230, 230, 240)
+            WIN.blit(TEXT.render(TINY_FONT, f"{rank}. {name[:8]}", color), (x + 12, y))
+            clock = TEXT.render(TINY_FONT, format_seconds(best_time), color)
+            WIN.blit(clock, (x + col_w - 12 - clock.get_width(), y))
+    draw_text_centered(WIN, "LEFT / RIGHT to switch  •  ESC to return", 550, TINY_FONT, (210, 210, 230))
+
+HUD_RECT = pygame.Rect(0, BOARD_Y + BOARD_SIZE + 4, WIDTH, HEIGHT - (BOARD_Y + BOARD_SIZE + 4))
+last_game_frame = {}  # inputs of the previous game frame, to find what changed
+
+def cell_rect(cell):
+    r, c = cell
+    return pygame.Rect(BOARD_X + c*CELL_SIZE, BOARD_Y + r*CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+def cell_region(cell):
+    # Row, column and box of a cell: everything its highlight, pulse and
+    # conflict marks can touch (padded to cover the thick grid lines)
+    if cell == (-1, -1):
+        return []
+    r, c = cell
+    br, bc = r - r % 3, c - c % 3
+    return [pygame.Rect(BOARD_X, BOARD_Y + r*CELL_SIZE, BOARD_SIZE, CELL_SIZE).inflate(4, 4),
+            pygame.Rect(BOARD_X + c*CELL_SIZE, BOARD_Y, CELL_SIZE, BOARD_SIZE).inflate(4, 4),
+            pygame.Rect(BOARD_X + bc*CELL_SIZE, BOARD_Y + br*CELL_SIZE, 3*CELL_SIZE, 3*CELL_SIZE).inflate(4, 4)]
 
-    pygame.display.update()
+def draw_game():
+    # Static layers come from cache; only regions whose inputs changed since
+    # the last frame, plus the pulsing selection, are copied to the window
+    frame = {"serial": puzzle_serial, "version": board_state.version,
+             "cell": selected_cell, "hud": (get_elapsed_time(), selected_difficulty)}
+    last = last_game_frame
+    if SCHEDULER.full or last.get("serial") != puzzle_serial:
+        rects = None
+    else:
+        rects = []
+        if last["cell"] != selected_cell or last["version"] != board_state.version:
+            rects += cell_region(last["cell"]) + cell_region(selected_cell)
+        if last["hud"] != frame["hud"]:
+            rects.append(HUD_RECT)
+        if selected_cell != (-1, -1):
+            rects.append(cell_rect(selected_cell))
+
+    PROFILER.push("compose")
+    GAME_LAYERS.compose(WIN, {
+        "background": GAME_BG,
+        "highlight": selected_cell,
+        "givens": puzzle_serial,
+        "entries": (puzzle_serial, board_state.version),
+        "conflicts": (puzzle_serial, board_state.version, selected_cell),
+        "hud": frame["hud"],
+    }, rects=rects)
+    PROFILER.pop()
+    draw_selection_pulse(WIN)
+
+    if rects is None:
+        SCHEDULER.invalidate()
+    for rect in rects or ():
+        SCHEDULER.invalidate(rect)
+    last_game_frame.clear()
+    last_game_frame.update(frame)
 
 def draw_win_screen():
     draw_vertical_gradient(WIN, (20, 40, 30), (10, 20, 15))
@@ -552,13 +702,14 @@ def draw_win_screen():
     glow_col = (255, 220 - pulse_value//2, 120)
     draw_text_centered(WIN, "🎉 Congratulations! 🎉", 90, FONT, glow_col)
     draw_text_centered(WIN, f"Your Time: {get_elapsed_time()}", 150, SMALL_FONT, (220, 230, 255))
+    SCHEDULER.invalidate(text_band(90, FONT))
+    SCHEDULER.invalidate(text_band(150, SMALL_FONT))
 
     play_again_btn=pygame.Rect(WIDTH//2-110, 240, 220, 60)
     menu_btn=pygame.Rect(WIDTH//2-110, 330, 220, 60)
     draw_button(WIN, play_again_btn, "Play Again", "win_again", base_color=(100,80,180), hover_color=(160,120,240))
     draw_button(WIN, menu_btn, "Main Menu", "win_menu", base_color=(180,80,100), hover_color=(240,120,160))
 
-    pygame.display.update()
     return play_again_btn,menu_btn
 
 
@@ -568,62 +719,172 @@ def draw_lost_screen():
     glow_col = (255, 100 + pulse_value//2, 100)
     draw_text_centered(WIN, "❌ Incorrect Solution! ❌", 90, FONT, glow_col)
     draw_text_centered(WIN, f"Your Time: {get_elapsed_time()}", 150, SMALL_FONT, (240, 200, 200))
+    SCHEDULER.invalidate(text_band(90, FONT))
+    SCHEDULER.invalidate(text_band(150, SMALL_FONT))
 
     play_again_btn = pygame.Rect(WIDTH//2-110, 240, 220, 60)
     menu_btn = pygame.Rect(WIDTH//2-110, 330, 220, 60)
     draw_button(WIN, play_again_btn, "Try Again", "lost_again", base_color=(200, 80, 80), hover_color=(255, 120, 120))
     draw_button(WIN, menu_btn, "Main Menu", "lost_menu", base_color=(120, 80, 200), hover_color=(160, 120, 255))
 
-    pygame.display.update()
     return play_again_btn, menu_btn
 
 
+def draw_profiler_overlay():
+    # Opaque panel, so it can be redrawn every frame over dirty-rect updates.
+    # Text goes straight through font.render to keep it out of TEXT and out
+    # of the allocation count.
+    summary = PROFILER.summary()
+    panel = PROFILER_PANEL
+    pygame.draw.rect(WIN, (10, 12, 20), panel)
+    pygame.draw.rect(WIN, (90, 200, 120), panel, 1)
+    SCHEDULER.invalidate(panel)
+    if summary is None:
+        return
+    other = summary["frame_ms"] - sum(summary["stages"].values())
+    lines = [f"FPS {summary['fps']:5.1f}  frame {summary['frame_ms']:5.2f} ms",
+             f"p95 {summary['p95_ms']:5.2f} ms  surfaces {summary['surfaces']}"]
+    disk = PERSISTER.stats()
+    lines.append(f"save queue {disk['queue_depth']:3d}  latency {disk['last_latency_ms']:6.1f} ms")
+    for name in PROFILER_STAGES:
+        ms = other if name == "other" else summary["stages"].get(name, 0.0)
+        lines.append(f"{name:24s}{ms:6.2f}")
+    y = panel.y + 6
+    for line in lines:
+        WIN.blit(PROFILER_FONT.render(line, True, (200, 230, 210)), (panel.x + 8, y))
+        y += 15
+
+    # Frame-time histogram, newest on the right; the mark is the 60 fps budget
+    hist = pygame.Rect(panel.x + 8, panel.bottom - 48, panel.width - 16, 40)
+    budget_y = hist.bottom - int(hist.height * 16.7 / 33.3)
+    recent = list(PROFILER.history)[-hist.width // 2:]
+    for i, record in enumerate(recent):
+        h = max(1, min(hist.height, int(hist.height * record["frame_ms"] / 33.3)))
+        color = (90, 200, 120) if record["frame_ms"] <= 16.7 else (230, 90, 90)
+        pygame.draw.line(WIN, color, (hist.x + i*2, hist.bottom), (hist.x + i*2, hist.bottom - h))
+    pygame.draw.line(WIN, (200, 200, 80), (hist.x, budget_y), (hist.right, budget_y))
+
+def startup():
+    # Before the first frame: the window, plus the user file read on a
+    # background thread
+    init_display()
+    load_users_async()
+    PERSISTER.start()
+    LEADERBOARD_PERSISTER.start()
+    GAME_LOG_PERSISTER.start()
+    if os.environ.get("SUDOKU_TRACE"):
+        PROFILER.start_trace(os.environ["SUDOKU_TRACE"])
+
+def after_first_frame():
+    # Slower setup that nothing on the login screen depends on
+    global PUZZLE_BANK
+    start_audio()
+    preload_numpy()
+    PUZZLE_BANK = open_default_bank()
+    PUZZLE_POOL.start()
+
 def main():
     global current_screen, selected_cell, active_input, input_text, login_message, selected_difficulty, current_user, start_time
-    clock = pygame.time.Clock()
+    global profiler_overlay, leaderboard_window, used_hint
+    startup()
+    first_frame = True
     history_screen_open=False
 
     # to catch ENTER on login
     username_box = password_box = login_btn = reg_btn = None
     buttons = {}
     play_again_btn = menu_btn = None
+    shown_screen = None
 
     while True:
-        clock.tick(60)
-
+        PROFILER.next_frame(screen=current_screen)
+        if current_screen != shown_screen:
+            SCHEDULER.invalidate()
+            shown_screen = current_screen
 
         if current_screen=="login":
             username_box, password_box, login_btn, reg_btn = draw_login_screen()
         elif current_screen=="home":
             buttons = draw_menu()
         elif current_screen=="history" and history_screen_open:
-            draw_history_screen(current_user)
+            if SCHEDULER.full:
+                draw_history_screen(current_user)
+        elif current_screen=="leaderboard":
+            if SCHEDULER.full:
+                draw_leaderboard_screen(leaderboard_window)
         elif current_screen=="game":
             draw_game()
             # ---- UPDATED: finish game on full board (win or lost) ---- #
-            if all(0 not in row for row in grid):  # board is fully filled
+            if board_state.is_complete():  # board is fully filled
                 elapsed_time = int(time.time() - start_time)
-                if is_board_complete_and_valid(grid):
-                    flash_completed_board()
-                    update_stats(current_user, selected_difficulty, True, elapsed_time)
-                    play_win()
-                    current_screen = "win"
+                if board_state.is_valid():
+                    def finish_win(elapsed_time=elapsed_time):
+                        global current_screen
+                        update_stats(current_user, selected_difficulty, True, elapsed_time)
+                        play_win()
+                        current_screen = "win"
+                    flash_completed_board(finish_win)
+                    current_screen = "complete"
                 else:
                     update_stats(current_user, selected_difficulty, False, elapsed_time)
                     play_lose()
                     current_screen = "lost"
+        elif current_screen=="complete":
+            if SCHEDULER.full:
+                draw_flash_frame()
         elif current_screen=="win":
             play_again_btn, menu_btn = draw_win_screen()
         elif current_screen=="lost":
             play_again_btn, menu_btn = draw_lost_screen()
+        if profiler_overlay:
+            draw_profiler_overlay()
+        PROFILER.push("display.update")
+        SCHEDULER.present()
+        PROFILER.pop()
+        if first_frame:
+            after_first_frame()
+            first_frame = False
 
         # --- EVENTS --- #
-        for event in pygame.event.get():
+        # Menus keep a pulsing title; the game screen only animates the
+        # selected cell and otherwise sleeps until the timer next changes.
+        if current_screen=="game":
+            animating = selected_cell != (-1, -1) or TIMELINE.active
+            timeout = ms_until_timer_tick()
+        else:
+            animating = current_screen not in ("history", "leaderboard") or TIMELINE.active
+            timeout = None
+        PROFILER.push("idle")
+        events = SCHEDULER.wait(animating or profiler_overlay, timeout)
+        PROFILER.pop()
+        TIMELINE.update(SCHEDULER.dt)
+        PROFILER.push("events")  # closed by the next frame's next_frame()
+        for event in events:
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                GRADIENTS.clear()
+                GAME_LAYERS.invalidate(WIN.get_size())
+            if event.type in REDRAW_EVENTS:
+                SCHEDULER.invalidate()
+            elif current_screen!="game" and event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                # menu screens are cheap to redraw whole on input
+                SCHEDULER.invalidate()
+
             if event.type==pygame.QUIT:
-                save_users()
+                PUZZLE_POOL.stop()
+                PROFILER.close()
+                wait_for_users()
+                USERS.close()
+                LEADERBOARD.close()
+                GAME_LOG.close()
                 pygame.quit()
                 sys.exit()
 
+            if event.type==pygame.KEYDOWN and event.key==pygame.K_F3:
+                profiler_overlay = not profiler_overlay
+                PROFILER.set_enabled(profiler_overlay)
+                SCHEDULER.invalidate()
+                continue
+
             # --- Login --- #
             if current_screen=="login":
                 if event.type==pygame.MOUSEBUTTONDOWN:
@@ -633,32 +894,33 @@ def main():
                         active_input="password"
                     elif login_btn and login_btn.collidepoint(event.pos):
                         press_button("login_btn")
+                        wait_for_users()
                         user=input_text["username"].strip()
                         pwd=input_text["password"].strip()
                         if user=="" or pwd=="":
                             login_message="Username/password cannot be empty!"
-                        elif user not in users:
+                        elif not USERS.has_user(user):
                             login_message="Username does not exist!"
-                        elif users[user]["password"]!=pwd:
+                        elif not USERS.check_login(user, pwd):
                             login_message="Incorrect password!"
                         else:
                             current_user=user
+                            prepare_history(user)
                             current_screen="home"
                             login_message=""
                             input_text={"username":"","password":""}
                     elif reg_btn and reg_btn.collidepoint(event.pos):
                         press_button("reg_btn")
+                        wait_for_users()
                         user=input_text["username"].strip()
                         pwd=input_text["password"].strip()
                         if len(user)<3:
                             login_message="Username must be at least 3 chars!"
                         elif len(pwd)<5:
                             login_message="Password must be at least 5 chars!"
-                        elif user in users:
+                        elif not USERS.register(user, pwd):
                             login_message="Username already exists!"
                         else:
-                            users[user]={"password":pwd,"stats":{"Easy":{"played":0,"won":0,"lost":0,"best_time":None},"Medium":{"played":0,"won":0,"lost":0,"best_time":None},"Hard":{"played":0,"won":0,"lost":0,"best_time":None}}}
-                            save_users()
                             login_message="Registered! Please login."
                             input_text={"username":"","password":""}
 
@@ -680,21 +942,38 @@ def main():
                 if event.type==pygame.MOUSEBUTTONDOWN:
                     for level,btn in buttons.items():
                         if btn.collidepoint(event.pos):
-                            press_button(f"menu_{'history' if level=='History' else level}")
+                            press_button(f"menu_{level.lower() if level in ('History', 'Leaderboard') else level}")
                             if level=="History":
+                                prepare_history(current_user)
                                 current_screen="history"
                                 history_screen_open=True
+                            elif level=="Leaderboard":
+                                current_screen="leaderboard"
                             else:
                                 selected_difficulty=level
                                 load_puzzle(level)
                                 current_screen="game"
                                 selected_cell=(-1,-1)
 
+            elif current_screen=="complete":
+                # any key or click skips the rest of the flash
+                if event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                    TIMELINE.cancel("flash", finish=True)
+
             elif current_screen=="history":
                 if event.type==pygame.KEYDOWN:
                     if event.key==pygame.K_ESCAPE:
                         current_screen="home"
 
+            elif current_screen=="leaderboard":
+                if event.type==pygame.KEYDOWN:
+                    if event.key==pygame.K_ESCAPE:
+                        current_screen="home"
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        step = 1 if event.key==pygame.K_RIGHT else -1
+                        idx = LEADERBOARD_WINDOWS.index(leaderboard_window)
+                        leaderboard_window = LEADERBOARD_WINDOWS[(idx + step) % len(LEADERBOARD_WINDOWS)]
+
             elif current_screen=="game":
                 if event.type==pygame.KEYDOWN:
                     if event.key==pygame.K_ESCAPE:
@@ -704,11 +983,15 @@ def main():
                         if original_grid[row][col]==0:
                             # editing keys
                             if event.key in [pygame.K_BACKSPACE,pygame.K_DELETE, pygame.K_0, pygame.K_KP0]:
-                                grid[row][col]=0
+                                set_cell(row, col, 0)
                             elif pygame.K_1<=event.key<=pygame.K_9:
-                                grid[row][col]=event.key-pygame.K_0
+                                set_cell(row, col, event.key-pygame.K_0)
                             elif pygame.K_KP1<=event.key<=pygame.K_KP9:
-                                grid[row][col]=event.key-pygame.K_KP0
+                                set_cell(row, col, event.key-pygame.K_KP0)
+                            elif event.key==pygame.K_h and current_puzzle:
+                                # hint: reveal the correct digit for this cell
+                                set_cell(row, col, current_puzzle.reveal(row, col))
+                                used_hint = True
 
                             # advance selection only when Enter/Tab pressed AND the cell currently has a number
                             if event.key in (pygame.K_RETURN, pygame.K_KP_ENTER, pygame.K_TAB):
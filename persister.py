@@ -0,0 +1,141 @@
+# persister.py
+# Write-behind persistence for the user stores.
+#
+# With a WriteBehind attached, a store applies each change in memory and
+# only buffers the write; this thread makes the buffer durable. Bursts are
+# coalesced: after the first change it waits `delay` seconds, then writes
+# everything buffered so far in one go (one fsync / one transaction). The
+# game loop therefore never waits on the disk.
+#
+# A store works with it by providing:
+#   pending_count()   buffered writes not yet taken by the writer
+#   write_pending()   take the buffer and make it durable (runs here);
+#                     returns how many changes it wrote
+# and gets the rest (hand-off after a change, flush, close) from
+# PersistedStore.
+
+import threading
+import time
+
+
+class PersistedStore:
+    # Mixin for the stores above. Without a persister every change is
+    # written on the calling thread, as before write-behind existed.
+
+    persister = None  # set by WriteBehind
+
+    def _changed(self):
+        # Call after buffering a change.
+        if self.persister is not None:
+            self.persister.notify()
+        else:
+            self.write_pending()
+
+    def flush(self):
+        if self.persister is not None:
+            self.persister.flush()
+        else:
+            self.write_pending()
+
+    def close(self):
+        # Drain everything, then let the store release its files.
+        if self.persister is not None:
+            self.persister.close()
+        self.write_pending()
+        self._close_files()
+
+    def _close_files(self):
+        pass
+
+
+class WriteBehind:
+
+    def __init__(self, store, delay=0.25):
+        self.store = store
+        self.delay = delay
+        self._wake = threading.Condition()
+        self._first_pending = None  # when the oldest unwritten change came in
+        self._write_lock = threading.Lock()
+        self._stop = False
+        self._thread = None
+        self.flushes = 0
+        self.last_flush_ms = 0.0    # time spent writing the last batch
+        self.max_flush_ms = 0.0
+        self.last_latency_ms = 0.0  # oldest change in the batch -> durable
+        self.max_latency_ms = 0.0
+        self.errors = 0
+        self.last_error = None
+        store.persister = self
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="persister", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        # Called by the store after buffering a change.
+        with self._wake:
+            if self._first_pending is None:
+                self._first_pending = time.perf_counter()
+            self._wake.notify()
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while self._first_pending is None and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+            time.sleep(self.delay)  # let a burst of changes pile up
+            self._write()
+
+    def _write(self):
+        # One batch; the lock keeps the thread and flush() from overlapping.
+        with self._write_lock:
+            with self._wake:
+                started = self._first_pending
+                self._first_pending = None
+            try:
+                t0 = time.perf_counter()
+                written = self.store.write_pending()
+                done = time.perf_counter()
+            except Exception as e:  # keep running; the next change retries
+                self.errors += 1
+                self.last_error = repr(e)
+                with self._wake:
+                    if self._first_pending is None:
+                        self._first_pending = started
+                return False
+            if written:
+                self.flushes += 1
+                self.last_flush_ms = (done - t0) * 1e3
+                self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+                if started is not None:
+                    self.last_latency_ms = (done - started) * 1e3
+                    self.max_latency_ms = max(self.max_latency_ms, self.last_latency_ms)
+            return True
+
+    def flush(self):
+        # Block until everything buffered so far is durable (waits out a
+        # batch already being written). For exit paths, not the game loop.
+        return self._write()
+
+    def close(self):
+        # Stop the thread and write whatever is left on the calling thread.
+        with self._wake:
+            self._stop = True
+            self._wake.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self):
+        return {
+            "queue_depth": self.store.pending_count(),
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "max_flush_ms": self.max_flush_ms,
+            "last_latency_ms": self.last_latency_ms,
+            "max_latency_ms": self.max_latency_ms,
+            "errors": self.errors,
+        }
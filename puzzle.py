@@ -0,0 +1,43 @@
+# puzzle.py
+# A generated puzzle together with its solution, so answer checks, hints and
+# "solve" are lookups instead of searches.
+
+import hashlib
+
+from fast_solver import BitBoard
+from puzzle_bank import pack_grid
+
+
+class Puzzle:
+
+    def __init__(self, givens, solution, difficulty=None):
+        self.givens = [row[:] for row in givens]
+        self.solution = [row[:] for row in solution]
+        self.difficulty = difficulty
+        # 41 bytes of givens + 41 of solution, same nibble packing as the bank
+        self.compact = pack_grid(self.givens) + pack_grid(self.solution)
+        self.digest = hashlib.sha1(self.compact).hexdigest()[:16]
+
+    @classmethod
+    def from_givens(cls, givens, difficulty=None):
+        # Solve once up front; None if the givens have no solution.
+        state = BitBoard(givens)
+        if not state.solve():
+            return None
+        return cls(givens, state.to_grid(), difficulty)
+
+    def is_given(self, r, c):
+        return self.givens[r][c] != 0
+
+    def is_correct(self, r, c, value):
+        return self.solution[r][c] == value
+
+    def reveal(self, r, c):
+        return self.solution[r][c]
+
+    def is_solved(self, board):
+        return board == self.solution
+
+    def wrong_cells(self, board):
+        return [(r, c) for r in range(9) for c in range(9)
+                if board[r][c] and board[r][c] != self.solution[r][c]]
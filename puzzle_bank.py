@@ -0,0 +1,337 @@
+# puzzle_bank.py
+# On-disk bank of pre-generated puzzles.
+#
+# Layout (little endian):
+#   header   64 bytes: magic, version, flags, record size, record count,
+#            index offset, index entry count
+#   records  fixed size; 81 nibbles of givens packed two cells per byte
+#            (41 bytes), followed by 41 more for the solution when the
+#            bank stores solutions
+#   index    one (difficulty, first record, record count) entry per batch,
+#            somewhere after the records (the header has its offset)
+#
+# Readers mmap the file, so picking a puzzle is a slice of the mapping and
+# nothing but the header and index is ever parsed up front. Records have to
+# stay contiguous, so an append needs the space the index occupies. It
+# first copies the index past the end of the new batch and points the
+# header at the copy, then writes the batch, then writes the new index
+# after the copy and points the header at that. Every step is fsynced
+# before the header moves, so a crash mid-append leaves the previous bank
+# intact.
+
+import bisect
+import mmap
+import os
+import random
+import struct
+
+from dlx_solver import count_solutions
+
+BANK_FILE = "puzzles.bank"
+
+MAGIC = b"SUDOKUBK"
+VERSION = 1
+FLAG_SOLUTIONS = 1
+
+HEADER = struct.Struct("<8sHHIIQI")
+HEADER_SIZE = 64
+INDEX_ENTRY = struct.Struct("<BxxxII")
+PACKED_SIZE = 41
+
+DIFFICULTY_CODES = {"Easy": 0, "Medium": 1, "Hard": 2}
+DIFFICULTY_NAMES = {code: name for name, code in DIFFICULTY_CODES.items()}
+
+
+class BankError(Exception):
+    pass
+
+
+def pack_grid(board):
+    cells = [board[r][c] for r in range(9) for c in range(9)] + [0]
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, 82, 2))
+
+
+def unpack_grid(data):
+    cells = []
+    for byte in data:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+    return [cells[r * 9:r * 9 + 9] for r in range(9)]
+
+
+def _read_header(data):
+    if len(data) < HEADER_SIZE:
+        raise BankError("file too short for a bank header")
+    magic, version, flags, record_size, record_count, index_offset, index_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise BankError("not a puzzle bank (bad magic)")
+    if version != VERSION:
+        raise BankError(f"unsupported bank version {version}")
+    return flags, record_size, record_count, index_offset, index_count
+
+
+def _read_index(data, index_offset, index_count, record_count, record_size):
+    if HEADER_SIZE + record_count * record_size > len(data):
+        raise BankError("records run past end of file")
+    if index_offset < HEADER_SIZE + record_count * record_size:
+        raise BankError("index overlaps the records")
+    end = index_offset + index_count * INDEX_ENTRY.size
+    if end > len(data):
+        raise BankError("index runs past end of file")
+    index = [INDEX_ENTRY.unpack_from(data, index_offset + i * INDEX_ENTRY.size)
+             for i in range(index_count)]
+    for code, start, count in index:
+        if start + count > record_count:
+            raise BankError(f"index entry at record {start} overruns record count")
+    return index
+
+
+class PuzzleBank:
+
+    def __init__(self, path=BANK_FILE):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            (self.flags, self.record_size, self.record_count,
+             index_offset, index_count) = _read_header(self._map)
+            index = _read_index(self._map, index_offset, index_count,
+                                self.record_count, self.record_size)
+        except (BankError, ValueError, OSError):
+            self.close()
+            raise
+        self.has_solutions = bool(self.flags & FLAG_SOLUTIONS)
+
+        # Per difficulty: cumulative counts for bisect plus the batch starts.
+        self._cumulative = {}
+        self._starts = {}
+        for code, start, count in index:
+            name = DIFFICULTY_NAMES.get(code)
+            if name is None or not count:
+                continue
+            cum = self._cumulative.setdefault(name, [])
+            cum.append((cum[-1] if cum else 0) + count)
+            self._starts.setdefault(name, []).append(start)
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def count(self, difficulty):
+        cum = self._cumulative.get(difficulty)
+        return cum[-1] if cum else 0
+
+    def get(self, difficulty, i):
+        # i-th puzzle of a difficulty as (puzzle, solution or None).
+        cum = self._cumulative[difficulty]
+        batch = bisect.bisect_right(cum, i)
+        offset = i - (cum[batch - 1] if batch else 0)
+        return self.get_record(self._starts[difficulty][batch] + offset)
+
+    def get_record(self, n):
+        pos = HEADER_SIZE + n * self.record_size
+        puzzle = unpack_grid(self._map[pos:pos + PACKED_SIZE])
+        solution = None
+        if self.has_solutions:
+            solution = unpack_grid(self._map[pos + PACKED_SIZE:pos + 2 * PACKED_SIZE])
+        return puzzle, solution
+
+    def random(self, difficulty, rng=random):
+        total = self.count(difficulty)
+        if not total:
+            return None
+        return self.get(difficulty, rng.randrange(total))
+
+
+class BankWriter:
+
+    def __init__(self, path=BANK_FILE, with_solutions=True):
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path):
+            self._file = open(path, "r+b")
+            data = self._file.read()
+            (self.flags, self.record_size, self.record_count,
+             self.index_offset, index_count) = _read_header(data)
+            self.index = _read_index(data, self.index_offset, index_count,
+                                     self.record_count, self.record_size)
+        else:
+            self._file = open(path, "w+b")
+            self.flags = FLAG_SOLUTIONS if with_solutions else 0
+            self.record_size = PACKED_SIZE * (2 if with_solutions else 1)
+            self.record_count = 0
+            self.index = []
+            self._write_index(HEADER_SIZE, self.record_count)
+
+    def append(self, difficulty, items):
+        # Append a batch of (puzzle, solution) pairs for one difficulty.
+        records = bytearray()
+        for puzzle, solution in items:
+            records += pack_grid(puzzle)
+            if self.flags & FLAG_SOLUTIONS:
+                if solution is None:
+                    raise BankError("this bank stores solutions; got None")
+                records += pack_grid(solution)
+        count = len(records) // self.record_size
+        if not count:
+            return
+        # 1. the current index, copied clear of both the new batch and itself
+        index_bytes = len(self.index) * INDEX_ENTRY.size
+        copy_at = max(HEADER_SIZE + (self.record_count + count) * self.record_size,
+                      self.index_offset + index_bytes)
+        self._write_index(copy_at, self.record_count)
+        # 2. the batch, over the space the old index used
+        self._file.seek(HEADER_SIZE + self.record_count * self.record_size)
+        self._file.write(records)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        code = DIFFICULTY_CODES[difficulty]
+        last = self.index[-1] if self.index else None
+        if last and last[0] == code and last[1] + last[2] == self.record_count:
+            self.index[-1] = (code, last[1], last[2] + count)
+        else:
+            self.index.append((code, self.record_count, count))
+        self.record_count += count
+        # 3. the new index after the copy, which the header still points at
+        self._write_index(copy_at + index_bytes, self.record_count)
+
+    def _write_index(self, index_offset, record_count):
+        # Write the index at index_offset, fsync, then switch the header to
+        # it; the header is the only thing a reader trusts.
+        self._file.seek(index_offset)
+        for entry in self.index:
+            self._file.write(INDEX_ENTRY.pack(*entry))
+        self._file.truncate()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        header = HEADER.pack(MAGIC, VERSION, self.flags, self.record_size,
+                             record_count, index_offset, len(self.index))
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.index_offset = index_offset
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _is_solved(board):
+    full = set(range(1, 10))
+    for i in range(9):
+        if set(board[i]) != full or {board[r][i] for r in range(9)} != full:
+            return False
+    for br in range(0, 9, 3):
+        for bc in range(0, 9, 3):
+            if {board[r][c] for r in range(br, br + 3) for c in range(bc, bc + 3)} != full:
+                return False
+    return True
+
+
+def verify_bank(path=BANK_FILE, check_unique=False):
+    # Returns a list of human readable problems; empty means the bank is OK.
+    problems = []
+    try:
+        bank = PuzzleBank(path)
+    except (BankError, ValueError, OSError) as e:
+        return [str(e)]
+    with bank:
+        expected = HEADER_SIZE + bank.record_count * bank.record_size
+        if bank.record_size != PACKED_SIZE * (2 if bank.has_solutions else 1):
+            problems.append(f"record size {bank.record_size} does not match flags")
+            return problems
+        if len(bank._map) < expected:
+            problems.append("records run past end of file")
+            return problems
+
+        seen = [False] * bank.record_count
+        for name, starts in bank._starts.items():
+            cum = bank._cumulative[name]
+            for j, start in enumerate(starts):
+                count = cum[j] - (cum[j - 1] if j else 0)
+                if start + count > bank.record_count:
+                    problems.append(f"{name} batch at {start} overruns record count")
+                    continue
+                for n in range(start, start + count):
+                    if seen[n]:
+                        problems.append(f"record {n} indexed twice")
+                    seen[n] = True
+        if not all(seen):
+            problems.append(f"{seen.count(False)} records not reachable from the index")
+
+        for n in range(bank.record_count):
+            puzzle, solution = bank.get_record(n)
+            if any(v > 9 for row in puzzle for v in row):
+                problems.append(f"record {n}: bad nibble in givens")
+                continue
+            if solution is not None:
+                if not _is_solved(solution):
+                    problems.append(f"record {n}: solution is not a valid grid")
+                elif any(puzzle[r][c] not in (0, solution[r][c]) for r in range(9) for c in range(9)):
+                    problems.append(f"record {n}: givens disagree with solution")
+            if check_unique and count_solutions(puzzle, 2) != 1:
+                problems.append(f"record {n}: puzzle does not have a unique solution")
+    return problems
+
+
+def open_default_bank(path=BANK_FILE):
+    # The bank is optional: None when there is no usable file.
+    if not os.path.exists(path):
+        return None
+    try:
+        bank = PuzzleBank(path)
+    except (BankError, ValueError, OSError):
+        return None
+    return bank
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from generator import make_puzzle
+
+    parser = argparse.ArgumentParser(description="Build or verify a Sudoku puzzle bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="generate puzzles and append them to a bank")
+    build.add_argument("path", nargs="?", default=BANK_FILE)
+    build.add_argument("--count", type=int, default=1000, help="puzzles per difficulty")
+    build.add_argument("--batch", type=int, default=500)
+    build.add_argument("--no-solutions", action="store_true")
+    check = sub.add_parser("verify", help="check bank structure and contents")
+    check.add_argument("path", nargs="?", default=BANK_FILE)
+    check.add_argument("--unique", action="store_true", help="also re-check uniqueness")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        with BankWriter(args.path, with_solutions=not args.no_solutions) as writer:
+            for difficulty in DIFFICULTY_CODES:
+                left = args.count
+                while left > 0:
+                    n = min(args.batch, left)
+                    writer.append(difficulty, [make_puzzle(difficulty) for _ in range(n)])
+                    left -= n
+                print(f"{difficulty}: {args.count} puzzles")
+    else:
+        issues = verify_bank(args.path, check_unique=args.unique)
+        for issue in issues:
+            print(issue)
+        print("OK" if not issues else f"{len(issues)} problem(s)")
+        raise SystemExit(1 if issues else 0)
@@ -0,0 +1,117 @@
+# puzzle_pool.py
+# Background pre-generation of puzzles so the game loop never waits on the
+# generator. Each difficulty has a bounded queue; once a queue drops to its
+# low-water mark, a worker refills it back up to the configured depth.
+# Workers use the graded `factory`; a miss on an empty queue is served by
+# the cheaper `fallback` so it stays within a frame budget.
+
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from generator import make_puzzle, quick_puzzle
+
+
+class PuzzlePool:
+
+    def __init__(self, difficulties, depth=4, low_water=1, workers=1,
+                 use_processes=False, factory=make_puzzle, fallback=quick_puzzle):
+        self.depth = depth
+        self.low_water = low_water
+        self.workers = workers
+        self.use_processes = use_processes
+        self.factory = factory
+        self.fallback = fallback
+        self.queues = {d: deque() for d in difficulties}
+        self.hits = 0
+        self.misses = 0
+        self._refilling = set(difficulties)
+        self._in_flight = {d: 0 for d in difficulties}
+        self._cond = threading.Condition()
+        self._threads = []
+        self._executor = None
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        if self.use_processes:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"puzzle-pool-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self._threads = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get(self, difficulty):
+        # Pop a ready (puzzle, solution) pair in O(1); generate an ungraded
+        # one synchronously only when the queue is empty.
+        queue = self.queues[difficulty]
+        try:
+            item = queue.popleft()
+            self.hits += 1
+        except IndexError:
+            item = None
+            self.misses += 1
+        if len(queue) <= self.low_water:
+            with self._cond:
+                self._refilling.add(difficulty)
+                self._cond.notify()
+        if item is None:
+            item = self.fallback(difficulty)
+        return item
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "depth": self.depth,
+            "low_water": self.low_water,
+            "ready": {d: len(q) for d, q in self.queues.items()},
+        }
+
+    def _next_job(self):
+        # Called with the condition held: pick a difficulty that still needs
+        # puzzles, or None when every queue is topped up.
+        for d in list(self._refilling):
+            if len(self.queues[d]) + self._in_flight[d] < self.depth:
+                return d
+            if not self._in_flight[d]:
+                self._refilling.discard(d)
+        return None
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                difficulty = self._next_job()
+                while self._running and difficulty is None:
+                    self._cond.wait()
+                    difficulty = self._next_job()
+                if not self._running:
+                    return
+                self._in_flight[difficulty] += 1
+            try:
+                if self._executor is not None:
+                    item = self._executor.submit(self.factory, difficulty).result()
+                else:
+                    item = self.factory(difficulty)
+            except Exception:
+                item = None
+            with self._cond:
+                self._in_flight[difficulty] -= 1
+                if item is not None:
+                    self.queues[difficulty].append(item)
+                else:
+                    # Don't spin on a failing factory; the next get() re-arms it.
+                    self._refilling.discard(difficulty)
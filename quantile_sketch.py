@@ -0,0 +1,100 @@
+# quantile_sketch.py
+# DDSketch: streaming quantiles with a relative-error guarantee in bounded
+# memory, for per-user solve-time percentiles.
+#
+# A value v > 0 is counted in bucket ceil(log(v) / log(gamma)) with
+# gamma = (1 + a) / (1 - a); any bucket's representative is within a
+# relative error `a` of every value in it, so quantile() answers within
+# `a` of the true quantile. Solve times from 1 s to a day need about 290
+# buckets at a = 2%; past `max_bins` the lowest buckets are folded together,
+# which only costs accuracy at the fast end of the distribution.
+#
+# Two sketches with the same accuracy merge exactly (bucket counts add),
+# so per-kiosk sketches can be combined offline. to_dict()/from_dict() give
+# a JSON-friendly form.
+
+import math
+
+RELATIVE_ACCURACY = 0.02
+MAX_BINS = 256
+
+
+class DDSketch:
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, max_bins=MAX_BINS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {}        # bucket key -> count
+        self.zero_count = 0   # values <= 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        if value > 0:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        else:
+            self.zero_count += count
+        self.count += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self):
+        # Fold the lowest buckets into the lowest one that is kept.
+        keys = sorted(self.bins)
+        extra = len(keys) - self.max_bins
+        folded = sum(self.bins.pop(k) for k in keys[:extra])
+        self.bins[keys[extra]] += folded
+
+    def merge(self, other):
+        # Add `other`'s counts into this sketch.
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError("cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def quantile(self, q):
+        # The q-quantile (0 <= q <= 1), or None when empty.
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return self.min if self.min <= 0 else 0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"accuracy": self.relative_accuracy, "zero": self.zero_count,
+                "min": self.min, "max": self.max,
+                "bins": {str(key): count for key, count in sorted(self.bins.items())}}
+
+    @classmethod
+    def from_dict(cls, data, max_bins=MAX_BINS):
+        sketch = cls(data["accuracy"], max_bins)
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.zero_count = data["zero"]
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
@@ -0,0 +1,230 @@
+# render_benchmark.py
+# Headless per-screen rendering benchmark for main.py.
+#
+#   python render_benchmark.py                    all screens, 300 frames each
+#   python render_benchmark.py --screen game      only screens containing "game"
+#   python render_benchmark.py --budget-ms 4      fail if a game screen's p95
+#                                                 frame time exceeds 4 ms
+#
+# Runs with SDL's dummy video driver and no audio, so it works in CI and on
+# machines without a display. Each screen is put into a scripted state and
+# driven for N frames the way main() drives it: draw, present, advance the
+# timeline by a fixed 60 Hz step. Frame times exclude the frame-cap sleep.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ["SUDOKU_HEADLESS"] = "1"
+
+import main as game  # noqa: E402  (needs SUDOKU_HEADLESS set first)
+import surface_tracker  # noqa: E402
+from benchmark import summarize  # noqa: E402
+from game_log import GameLog  # noqa: E402
+from leaderboard import Leaderboard  # noqa: E402
+from user_store import UserStore  # noqa: E402
+
+FRAME_DT = 1 / 60
+BENCH_USER = "bench"
+
+
+def _bench_store(directory):
+    # A throwaway store with one user and some history, so the real
+    # users.json is never touched
+    store = UserStore(os.path.join(directory, "users.json"))
+    store.load()
+    store.register(BENCH_USER, "bench")
+    for level in ("Easy", "Medium", "Hard"):
+        for i in range(12):
+            store.record_result(BENCH_USER, level, i % 4 != 0, 245 + i)
+    return store
+
+
+def _bench_log(directory):
+    # Matching games in a throwaway log, for the History averages
+    log = GameLog(os.path.join(directory, "history"))
+    for level in ("Easy", "Medium", "Hard"):
+        for i in range(12):
+            log.append(BENCH_USER, level, "0" * 16, 245 + i, i % 4 != 0, 60 + i)
+    log.stats(BENCH_USER)  # what prepare_history() builds at login
+    return log
+
+
+def _conflict_cell():
+    # An empty cell plus a digit already given in its row.
+    for r in range(9):
+        givens = [v for v in game.grid[r] if v]
+        for c in range(9):
+            if game.grid[r][c] == 0 and givens:
+                return (r, c), givens[0]
+    return (0, 0), 1
+
+
+def setup_login():
+    game.current_screen = "login"
+    game.active_input = "password"
+    game.input_text = {"username": BENCH_USER, "password": "secret"}
+    game.login_message = "Incorrect password!"
+
+
+def setup_home():
+    game.current_screen = "home"
+    game.current_user = BENCH_USER
+
+
+def setup_history():
+    game.current_screen = "history"
+    game.current_user = BENCH_USER
+
+
+def setup_leaderboard():
+    game.current_screen = "leaderboard"
+    game.leaderboard_window = "all"
+
+
+def setup_game():
+    game.current_screen = "game"
+    game.selected_difficulty = "Medium"
+    game.load_puzzle("Medium")
+    cell, digit = _conflict_cell()
+    game.selected_cell = cell
+    game.set_cell(cell[0], cell[1], digit)
+
+
+def setup_win():
+    game.current_screen = "win"
+    game.start_time = time.time() - 245
+
+
+def setup_lost():
+    game.current_screen = "lost"
+    game.start_time = time.time() - 245
+
+
+def draw_frame(screen, frame):
+    if screen in ("history", "leaderboard"):
+        # main() only redraws these after an invalidate (a key, a click, the
+        # summary arriving); force one so every frame measures the full draw
+        # rather than 299 no-ops.
+        game.SCHEDULER.invalidate()
+    if screen == "login":
+        game.draw_login_screen()
+    elif screen == "home":
+        game.draw_menu()
+    elif screen == "history":
+        if game.SCHEDULER.full:
+            game.draw_history_screen(game.current_user)
+    elif screen == "leaderboard":
+        if game.SCHEDULER.full:
+            game.draw_leaderboard_screen(game.leaderboard_window)
+    elif screen == "game":
+        game.draw_game()
+    elif screen == "game_typing":
+        # a digit typed into the selected cell every frame
+        r, c = game.selected_cell
+        game.set_cell(r, c, frame % 9 + 1)
+        game.draw_game()
+    elif screen == "win":
+        game.draw_win_screen()
+    elif screen == "lost":
+        game.draw_lost_screen()
+    game.SCHEDULER.present()
+    game.TIMELINE.update(FRAME_DT)
+
+
+SCREENS = {
+    "login": setup_login,
+    "home": setup_home,
+    "history": setup_history,
+    "leaderboard": setup_leaderboard,
+    "game": setup_game,
+    "game_typing": setup_game,
+    "win": setup_win,
+    "lost": setup_lost,
+}
+
+
+def run_screen(screen, frames):
+    SCREENS[screen]()
+    game.SCHEDULER.invalidate()
+
+    times = []
+    surfaces_before = surface_tracker.count() + game.TEXT.misses
+    for frame in range(frames):
+        t0 = time.perf_counter()
+        draw_frame(screen, frame)
+        times.append(time.perf_counter() - t0)
+    surfaces = surface_tracker.count() + game.TEXT.misses - surfaces_before
+
+    # Second pass under tracemalloc: Python-side bytes allocated per frame.
+    # Kept apart from the timed pass because tracing slows everything down.
+    tracemalloc.start()
+    py_bytes = 0
+    for frame in range(frames):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        draw_frame(screen, frame)
+        _, peak = tracemalloc.get_traced_memory()
+        py_bytes += peak - start
+    tracemalloc.stop()
+
+    result = summarize(times)
+    result["surfaces_per_frame"] = surfaces / frames
+    result["py_kib_per_frame"] = py_bytes / frames / 1024
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless per-screen render benchmark")
+    parser.add_argument("--frames", type=int, default=300, help="frames per screen")
+    parser.add_argument("--screen", default="", help="only screens containing this text")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="fail if a game screen's p95 frame time exceeds this")
+    parser.add_argument("--output", help="also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    game.init_display()
+    tmp = tempfile.TemporaryDirectory()
+    game.USERS = _bench_store(tmp.name)
+    game.LEADERBOARD = Leaderboard(os.path.join(tmp.name, "leaderboard.json"))
+    game.LEADERBOARD.load(game.USERS)
+    game.GAME_LOG = _bench_log(tmp.name)
+    surface_tracker.install()
+    results = {}
+    try:
+        for screen in SCREENS:
+            if args.screen not in screen:
+                continue
+            stats = run_screen(screen, args.frames)
+            results[screen] = stats
+            print(f"{screen:12s} mean {stats['mean_ms']:7.3f}  p50 {stats['p50_ms']:7.3f}  "
+                  f"p95 {stats['p95_ms']:7.3f}  p99 {stats['p99_ms']:7.3f} ms  "
+                  f"{stats['surfaces_per_frame']:6.2f} surf/frame  "
+                  f"{stats['py_kib_per_frame']:7.2f} KiB/frame")
+    finally:
+        surface_tracker.uninstall()
+        game.USERS.close()
+        game.GAME_LOG.close()
+        tmp.cleanup()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"frames": args.frames, "results": results}, f, indent=2)
+
+    if args.budget_ms is not None:
+        over = [name for name, stats in results.items()
+                if name.startswith("game") and stats["p95_ms"] > args.budget_ms]
+        for name in over:
+            print(f"OVER BUDGET {name}: p95 {results[name]['p95_ms']:.3f} ms > {args.budget_ms:.3f} ms")
+        if over:
+            return 1
+        print(f"game screens within {args.budget_ms:.3f} ms p95 budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# render_cache.py
+# Caches for surfaces that are expensive to build but rarely change.
+
+import sys
+import threading
+from collections import OrderedDict
+
+import pygame
+
+
+class GradientCache:
+    # Vertical gradients keyed by (top colour, bottom colour, size). Each one
+    # is built once, then drawing it is a single blit. Least recently used
+    # entries are dropped past `max_entries`.
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, top_rgb, bottom_rgb, size):
+        key = (tuple(top_rgb), tuple(bottom_rgb), tuple(size))
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = build_gradient(top_rgb, bottom_rgb, size)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        # Call when the window is resized or the display mode changes.
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+def build_gradient(top_rgb, bottom_rgb, size):
+    width, height = size
+    surf = pygame.Surface((width, height))
+    if pygame.display.get_surface() is not None:
+        surf = surf.convert()
+    # numpy only once preload_numpy() has imported it: importing it here
+    # would put ~70 ms on the first frame, which draws the login gradient.
+    np = sys.modules.get("numpy")
+
+    if np is not None:
+        # Same per-row colour as the line-by-line version, filled in one go.
+        t = np.arange(height) / max(1, height - 1)
+        top = np.array(top_rgb, dtype=float)
+        bottom = np.array(bottom_rgb, dtype=float)
+        rows = (top + (bottom - top) * t[:, None]).astype(np.int32)
+        pixels = np.broadcast_to(rows[None, :, :], (width, height, 3))
+        pygame.surfarray.blit_array(surf, np.ascontiguousarray(pixels))
+        return surf
+
+    r1, g1, b1 = top_rgb
+    r2, g2, b2 = bottom_rgb
+    for i in range(height):
+        t = i / max(1, height - 1)
+        color = (int(r1 + (r2 - r1) * t), int(g1 + (g2 - g1) * t), int(b1 + (b2 - b1) * t))
+        pygame.draw.line(surf, color, (0, i), (width, i))
+    return surf
+
+
+def preload_numpy():
+    # Import numpy on a background thread so later gradients can use it.
+    def load():
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            pass
+    threading.Thread(target=load, name="numpy-import", daemon=True).start()
+
+
+class TextCache:
+    # Rendered text surfaces keyed by (font, text, colour, antialias), with
+    # LRU eviction past `max_entries`. Pinned entries (e.g. board digits
+    # rendered at startup) are never evicted.
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self._pinned = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._pinned.get(key)
+        if surf is not None:
+            self.hits += 1
+            return surf
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def prerender(self, font, texts, colors, antialias=True):
+        # Render every text in every colour now and pin the results.
+        for color in colors:
+            for text in texts:
+                key = (font, text, tuple(color), antialias)
+                if key not in self._pinned:
+                    self._pinned[key] = font.render(text, antialias, color)
+
+    def clear(self):
+        self._surfaces.clear()
+        self._pinned.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self._surfaces), "pinned": len(self._pinned)}
+
+
+class LazyFont:
+    # Stands in for a pygame font and creates it on first use. SysFont scans
+    # the system font list the first time it is called, so fonts nothing has
+    # drawn with yet stay off the startup path. Hashes by identity, so it
+    # works as a TextCache key.
+
+    def __init__(self, name, size):
+        self._name = name
+        self._size = size
+        self._font = None
+
+    def load(self):
+        if self._font is None:
+            self._font = pygame.font.SysFont(self._name, self._size)
+        return self._font
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
@@ -0,0 +1,63 @@
+# render_scheduler.py
+# Decides what reaches the display and how long the main loop sleeps.
+#
+# Screens mark the regions they changed with invalidate(); present() pushes
+# only those rectangles to the display. While something is animating the
+# loop runs at the frame cap, otherwise wait() blocks in pygame.event.wait
+# until input arrives or the next scheduled change (e.g. the timer) is due.
+
+import pygame
+
+
+class RenderScheduler:
+
+    def __init__(self, fps=60, idle_timeout_ms=1000):
+        self.fps = fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.clock = pygame.time.Clock()
+        self._rects = []
+        self._full = True
+        self.dt = 0.0         # seconds since the previous wait(), for animations
+        self.frames = 0       # presents that reached the display
+        self.idle_waits = 0   # iterations that slept in event.wait
+
+    @property
+    def full(self):
+        # True when the whole window has to be redrawn this frame.
+        return self._full
+
+    def invalidate(self, rect=None):
+        # Mark a region for the next present(); None means the whole window.
+        if rect is None:
+            self._full = True
+            self._rects = []
+        elif not self._full:
+            self._rects.append(pygame.Rect(rect))
+
+    def present(self):
+        # Push the marked regions to the display; False if nothing changed.
+        if self._full:
+            pygame.display.update()
+        elif self._rects:
+            pygame.display.update(self._rects)
+        else:
+            return False
+        self._full = False
+        self._rects = []
+        self.frames += 1
+        return True
+
+    def wait(self, animating, timeout_ms=None):
+        # Events for the next iteration. Animating frames are capped at `fps`;
+        # idle ones sleep until an event arrives or timeout_ms passes.
+        if animating:
+            self.dt = self.clock.tick(self.fps) / 1000.0
+            return pygame.event.get()
+        if timeout_ms is None:
+            timeout_ms = self.idle_timeout_ms
+        self.idle_waits += 1
+        event = pygame.event.wait(max(1, int(timeout_ms)))
+        self.dt = self.clock.tick() / 1000.0
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events.extend(pygame.event.get())
+        return events
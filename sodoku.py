@@ -2,7 +2,9 @@
 import time
 
 import pygame
-from solver import solve, is_valid
+from puzzle import Puzzle
+from puzzle_bank import open_default_bank
+from puzzles import easy_puzzle, medium_puzzle, hard_puzzle, sample_grid
 
 pygame.init()
 
@@ -12,58 +14,23 @@ pygame.display.set_caption("Sudoku")
 
 font = pygame.font.SysFont("comicsans", 40)
 small_font = pygame.font.SysFont("comicsans", 24)
-# Predefined puzzles
-easy_puzzle = [
-    [0, 0, 3, 0, 2, 0, 6, 0, 0],
-    [9, 0, 0, 3, 0, 5, 0, 0, 1],
-    [0, 0, 1, 8, 0, 6, 4, 0, 0],
-    [0, 0, 8, 1, 0, 2, 9, 0, 0],
-    [7, 0, 0, 0, 0, 0, 0, 0, 8],
-    [0, 0, 6, 7, 0, 8, 2, 0, 0],
-    [0, 0, 2, 6, 0, 9, 5, 0, 0],
-    [8, 0, 0, 2, 0, 3, 0, 0, 9],
-    [0, 0, 5, 0, 1, 0, 3, 0, 0]
-]
-
-medium_puzzle = [
-    [0, 0, 0, 0, 6, 0, 0, 0, 0],
-    [0, 0, 0, 1, 0, 0, 0, 9, 0],
-    [0, 0, 0, 0, 0, 4, 2, 0, 0],
-    [0, 0, 0, 0, 5, 9, 0, 0, 8],
-    [0, 0, 7, 0, 0, 0, 1, 0, 0],
-    [5, 0, 0, 7, 3, 0, 0, 0, 0],
-    [0, 0, 3, 5, 0, 0, 0, 0, 0],
-    [0, 5, 0, 0, 0, 3, 0, 0, 0],
-    [0, 0, 0, 0, 1, 0, 0, 0, 0]
-]
-
-hard_puzzle = [
-    [0, 0, 0, 6, 0, 0, 4, 0, 0],
-    [7, 0, 0, 0, 0, 3, 6, 0, 0],
-    [0, 0, 0, 0, 9, 1, 0, 8, 0],
-    [0, 0, 0, 0, 0, 0, 0, 0, 0],
-    [0, 5, 0, 1, 8, 0, 0, 0, 3],
-    [0, 0, 0, 3, 0, 6, 0, 4, 5],
-    [0, 4, 0, 2, 0, 0, 0, 6, 0],
-    [9, 0, 3, 0, 0, 0, 0, 0, 0],
-    [0, 2, 0, 0, 0, 0, 1, 0, 0]
-]
-
-# Sample Sudoku puzzle (0 = empty)
-grid = [
-    [7, 8, 0, 4, 0, 0, 1, 2, 0],
-    [6, 0, 0, 0, 7, 5, 0, 0, 9],
-    [0, 0, 0, 6, 0, 1, 0, 7, 8],
-    [0, 0, 7, 0, 4, 0, 2, 6, 0],
-    [0, 0, 1, 0, 5, 0, 9, 3, 0],
-    [9, 0, 4, 0, 6, 0, 0, 0, 5],
-    [0, 7, 0, 3, 0, 0, 0, 1, 2],
-    [1, 2, 0, 0, 0, 7, 4, 0, 0],
-    [0, 4, 9, 2, 0, 6, 0, 0, 7]
-]
-
+grid = [row[:] for row in sample_grid]  # Sample Sudoku puzzle (0 = empty)
 original_grid = [row[:] for row in grid]  # Save original
 
+# Pre-built puzzle bank, if one was shipped next to the game
+puzzle_bank = open_default_bank()
+
+def pick_puzzle(level, fallback):
+    if puzzle_bank and puzzle_bank.count(level):
+        givens, solution = puzzle_bank.random(level)
+        if solution is not None:
+            return Puzzle(givens, solution, level)
+        puzzle = Puzzle.from_givens(givens, level)
+        if puzzle is not None:
+            return puzzle
+        # unsolvable bank record: use the built-in puzzle instead
+    return Puzzle.from_givens(fallback, level)
+
 selected = None
 
 def draw_grid(win):
@@ -147,11 +114,11 @@ def select_difficulty():
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_1:
-                    return easy_puzzle
+                    return pick_puzzle("Easy", easy_puzzle)
                 elif event.key == pygame.K_2:
-                    return medium_puzzle
+                    return pick_puzzle("Medium", medium_puzzle)
                 elif event.key == pygame.K_3:
-                    return hard_puzzle
+                    return pick_puzzle("Hard", hard_puzzle)
 
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
@@ -170,7 +137,7 @@ def select_difficulty():
 def main(puzzle):
     global grid, original_grid, selected
     selected = None
-    grid = [row[:] for row in puzzle]
+    grid = [row[:] for row in puzzle.givens]
     original_grid = [row[:] for row in grid]
     start_time = time.time()
 
@@ -193,7 +160,9 @@ def main(puzzle):
                         elif event.key in [pygame.K_BACKSPACE, pygame.K_DELETE]:
                             grid[row][col] = 0
                         elif event.key == pygame.K_RETURN:
-                            solve(grid)
+                            # stored solution, so wrong entries can't stall a search
+                            for r in range(9):
+                                grid[r][:] = puzzle.solution[r]
 
                 # Press ESC to go back to level selection
                 if event.key == pygame.K_ESCAPE:
@@ -0,0 +1,78 @@
+# solve_stats.py
+# Opt-in instrumentation shared by the solving engines.
+#
+# Pass a SolveStats to a solve/count call to have it filled in, or install a
+# process-wide callback with set_callback() to receive one for every call.
+# With neither, the engines take their uninstrumented code paths.
+
+import time
+
+_callback = None
+
+
+class SolveStats:
+
+    def __init__(self, engine=""):
+        self.engine = engine
+        self.nodes = 0             # search nodes entered
+        self.backtracks = 0        # tried digits / rows that were undone
+        self.max_depth = 0
+        self.candidates_tried = 0
+        self.propagations = 0      # cells filled by constraint propagation
+        self.wall_time = 0.0       # seconds
+        self.solutions = 0
+        self._t0 = None
+
+    def start(self):
+        self._t0 = time.perf_counter()
+
+    def stop(self):
+        if self._t0 is not None:
+            self.wall_time += time.perf_counter() - self._t0
+            self._t0 = None
+
+    def as_dict(self):
+        return {
+            "engine": self.engine,
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "candidates_tried": self.candidates_tried,
+            "propagations": self.propagations,
+            "wall_time_ms": self.wall_time * 1e3,
+            "solutions": self.solutions,
+        }
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"SolveStats({fields})"
+
+
+def set_callback(fn):
+    # fn(stats) is called after every instrumented solve; None disables.
+    global _callback
+    _callback = fn
+
+
+def get_callback():
+    return _callback
+
+
+def begin(stats, engine):
+    # Stats object to fill for this call: the caller's, a fresh one when a
+    # callback is installed, otherwise None (uninstrumented).
+    if stats is None and _callback is not None:
+        stats = SolveStats(engine)
+    if stats is not None:
+        if not stats.engine:
+            stats.engine = engine
+        stats.start()
+    return stats
+
+
+def finish(stats):
+    if stats is None:
+        return
+    stats.stop()
+    if _callback is not None:
+        _callback(stats)
@@ -1,4 +1,6 @@
 # solver.py
+import solve_stats
+
 
 def is_valid(board, num, pos):
     row, col = pos
@@ -33,7 +35,19 @@ def find_empty(board):
     return None
 
 
-def solve(board):
+def solve(board, stats=None):
+    stats = solve_stats.begin(stats, "backtracking")
+    solved = _solve(board, stats)
+    if stats is not None:
+        stats.solutions += int(solved)
+    solve_stats.finish(stats)
+    return solved
+
+
+def _solve(board, stats=None, depth=0):
+    if stats is not None:
+        stats.nodes += 1
+        stats.max_depth = max(stats.max_depth, depth)
     empty = find_empty(board)
     if not empty:
         return True  # Solved
@@ -41,11 +55,15 @@ def solve(board):
     row, col = empty
     for num in range(1, 10):
         if is_valid(board, num, (row, col)):
+            if stats is not None:
+                stats.candidates_tried += 1
             board[row][col] = num
 
-            if solve(board):
+            if _solve(board, stats, depth + 1):
                 return True
 
+            if stats is not None:
+                stats.backtracks += 1
             board[row][col] = 0  # Backtrack
 
     return False
@@ -0,0 +1,287 @@
+# sqlite_store.py
+# SQLite backend for users and stats, for installs with many accounts.
+#
+# Same interface as user_store.UserStore, but nothing is loaded up front:
+# a login is one indexed lookup and a history screen one primary-key read.
+# Every finished game is kept in `results`; `stats` holds the per-level
+# totals that the game shows, updated in the same transaction.
+#
+#   python sqlite_store.py import users.json [--db users.db]
+#
+# copies an existing users.json (plus its journal) into the database. A
+# new database imports users.json by itself the first time it is opened.
+#
+# Users being played are cached in memory, so the game reads its own writes
+# without touching the database. With a persister.WriteBehind attached,
+# registrations and results are queued and committed in batches on the
+# persister's own connection; in WAL mode that never blocks the readers.
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from persister import PersistedStore
+from user_store import LEVELS, USERS_FILE, UserStore, apply_result, new_level_stats
+
+DB_FILE = "users.db"
+CACHE_USERS = 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL UNIQUE,          -- unique index = login lookup
+    password TEXT NOT NULL,
+    created  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    user_id   INTEGER NOT NULL REFERENCES users(id),
+    level     TEXT NOT NULL,
+    played    INTEGER NOT NULL DEFAULT 0,
+    won       INTEGER NOT NULL DEFAULT 0,
+    lost      INTEGER NOT NULL DEFAULT 0,
+    best_time INTEGER,
+    avg_time  REAL,                          -- rolling average of wins
+    sketch    TEXT,                          -- DDSketch of win times, as JSON
+    PRIMARY KEY (user_id, level)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS stats_best_time
+    ON stats (level, best_time) WHERE best_time IS NOT NULL;
+CREATE TABLE IF NOT EXISTS results (
+    id       INTEGER PRIMARY KEY,
+    user_id  INTEGER NOT NULL REFERENCES users(id),
+    level    TEXT NOT NULL,
+    won      INTEGER NOT NULL,
+    time     INTEGER NOT NULL,
+    finished REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_user ON results (user_id, finished);
+"""
+
+# Statements are kept as constants so sqlite3's statement cache reuses the
+# prepared form on every call.
+SQL_USER_ID = "SELECT id FROM users WHERE name = ?"
+SQL_PASSWORD = "SELECT password FROM users WHERE name = ?"
+SQL_ADD_USER = "INSERT OR IGNORE INTO users (name, password, created) VALUES (?, ?, ?)"
+SQL_ADD_RESULT = "INSERT INTO results (user_id, level, won, time, finished) VALUES (?, ?, ?, ?, ?)"
+# avg_time and sketch are computed in Python (user_store.apply_result) and
+# written as they stood after the game.
+SQL_UPDATE_STATS = """
+INSERT INTO stats (user_id, level, played, won, lost, best_time, avg_time, sketch) VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id, level) DO UPDATE SET
+    played = played + 1,
+    won = won + excluded.won,
+    lost = lost + excluded.lost,
+    best_time = CASE
+        WHEN excluded.best_time IS NULL THEN best_time
+        WHEN best_time IS NULL OR excluded.best_time < best_time THEN excluded.best_time
+        ELSE best_time END,
+    avg_time = excluded.avg_time,
+    sketch = excluded.sketch
+"""
+SQL_SET_STATS = """
+INSERT OR IGNORE INTO stats (user_id, level, played, won, lost, best_time, avg_time, sketch)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SQL_STATS = """
+SELECT level, played, won, lost, best_time, avg_time, sketch FROM stats
+WHERE user_id = (SELECT id FROM users WHERE name = ?)
+"""
+SQL_BEST_TIMES = """
+SELECT users.name, stats.best_time FROM stats JOIN users ON users.id = stats.user_id
+WHERE stats.level = ? AND stats.best_time IS NOT NULL
+ORDER BY stats.best_time LIMIT ?
+"""
+
+
+class SQLiteUserStore(PersistedStore):
+
+    def __init__(self, path=DB_FILE, import_from=USERS_FILE, cache_users=CACHE_USERS):
+        self.path = path
+        self.import_from = import_from  # users.json to pull in on first open
+        self.cache_users = cache_users
+        self.conn = None        # reads
+        self._writer = None     # writes, on whichever thread runs write_pending
+        # name -> {"password", "stats", "writes"}; entries with writes still
+        # queued are never evicted, so reads always include them
+        self._cache = OrderedDict()
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Used from the startup thread, the game loop and the persister, one
+        # caller per connection at a time, hence check_same_thread=False.
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def load(self):
+        new = not os.path.exists(self.path)
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(stats)")}
+        for column, kind in (("avg_time", "REAL"), ("sketch", "TEXT")):
+            if column not in columns:  # databases from before the sketches
+                self.conn.execute(f"ALTER TABLE stats ADD COLUMN {column} {kind}")
+        if new and self.import_from and os.path.exists(self.import_from):
+            self.import_json(self.import_from)
+
+    def import_json(self, path):
+        # Copy users and stats from a users.json (and users.journal); names
+        # already in the database are left alone. Returns the number added.
+        source = UserStore(path)
+        users = source.load(read_only=True)
+        now = time.time()
+        added = 0
+        with self.conn:
+            for name, data in users.items():
+                cur = self.conn.execute(SQL_ADD_USER, (name, data["password"], now))
+                if cur.rowcount != 1:
+                    continue
+                added += 1
+                self.conn.executemany(SQL_SET_STATS, (
+                    (cur.lastrowid, level, s["played"], s["won"], s["lost"], s["best_time"],
+                     s.get("avg_time"), json.dumps(s["times"]) if s.get("times") else None)
+                    for level, s in data["stats"].items()
+                    if level in LEVELS and s["played"]))
+        return added
+
+    # ---- reads ----
+    def _user(self, username):
+        entry = self._cache.get(username)
+        if entry is not None:
+            self._cache.move_to_end(username)
+            return entry
+        row = self.conn.execute(SQL_PASSWORD, (username,)).fetchone()
+        if row is None:
+            return None
+        stats = {level: new_level_stats() for level in LEVELS}
+        for level, played, won, lost, best_time, avg_time, sketch in self.conn.execute(SQL_STATS, (username,)):
+            stats[level] = {"played": played, "won": won, "lost": lost, "best_time": best_time,
+                            "avg_time": avg_time, "times": json.loads(sketch) if sketch else None}
+        entry = {"password": row[0], "stats": stats, "writes": 0}
+        self._remember(username, entry)
+        return entry
+
+    def _remember(self, username, entry):
+        with self._lock:
+            self._cache[username] = entry
+            if len(self._cache) > self.cache_users:
+                for name in list(self._cache):
+                    if len(self._cache) <= self.cache_users:
+                        break
+                    if self._cache[name]["writes"] == 0:
+                        del self._cache[name]
+
+    def has_user(self, username):
+        return self._user(username) is not None
+
+    def check_login(self, username, password):
+        entry = self._user(username)
+        return entry is not None and entry["password"] == password
+
+    def get_stats(self, username):
+        return self._user(username)["stats"]
+
+    def best_times(self, level, limit=10):
+        # [(name, seconds)] fastest first, straight off the stats_best_time
+        # index; results still queued for the writer are not in it yet.
+        return self.conn.execute(SQL_BEST_TIMES, (level, limit)).fetchall()
+
+    # ---- writes ----
+    def _queue(self, op, entry):
+        with self._lock:
+            entry["writes"] += 1
+            self._pending.append(op)
+        self._changed()
+
+    def register(self, username, password):
+        if self._user(username) is not None:
+            return False
+        entry = {"password": password, "writes": 0,
+                 "stats": {level: new_level_stats() for level in LEVELS}}
+        self._remember(username, entry)
+        self._queue(("register", username, password, time.time()), entry)
+        return True
+
+    def record_result(self, username, level, won, elapsed_time=0, hinted=False):
+        entry = self._user(username)
+        if entry is None:
+            return
+        stats = entry["stats"][level]
+        apply_result(stats, won, elapsed_time, hinted)
+        sketch = json.dumps(stats["times"]) if stats.get("times") else None
+        self._queue(("result", username, level, bool(won), bool(hinted), elapsed_time, time.time(),
+                     stats.get("avg_time"), sketch), entry)
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def write_pending(self):
+        # Everything queued, in one transaction.
+        with self._lock:
+            ops, self._pending = self._pending, []
+        if not ops:
+            return 0
+        try:
+            if self._writer is None:
+                self._writer = self._connect()
+            with self._writer:
+                for op in ops:
+                    if op[0] == "register":
+                        _, name, password, created = op
+                        self._writer.execute(SQL_ADD_USER, (name, password, created))
+                    else:
+                        self._write_result(*op[1:])
+        except Exception:
+            with self._lock:
+                self._pending[:0] = ops
+            raise
+        with self._lock:
+            for op in ops:
+                entry = self._cache.get(op[1])
+                if entry is not None:
+                    entry["writes"] -= 1
+        return len(ops)
+
+    def _write_result(self, username, level, won, hinted, elapsed_time, finished, avg_time, sketch):
+        # The game row and the stats update share the caller's transaction.
+        row = self._writer.execute(SQL_USER_ID, (username,)).fetchone()
+        if row is None:
+            return
+        user_id = row[0]
+        self._writer.execute(SQL_ADD_RESULT, (user_id, level, int(won), elapsed_time, finished))
+        self._writer.execute(SQL_UPDATE_STATS, (user_id, level, 1 if won else 0, 0 if won else 1,
+                                                elapsed_time if won and not hinted else None,
+                                                avg_time, sketch))
+
+    def _close_files(self):
+        for conn in (self._writer, self.conn):
+            if conn is not None:
+                conn.close()
+        self._writer = self.conn = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SQLite user store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="copy a users.json into the database")
+    imp.add_argument("source", nargs="?", default=USERS_FILE)
+    imp.add_argument("--db", default=DB_FILE)
+    args = parser.parse_args(argv)
+
+    store = SQLiteUserStore(args.db, import_from=None)
+    store.load()
+    added = store.import_json(args.source)
+    store.close()
+    print(f"imported {added} users from {args.source} into {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
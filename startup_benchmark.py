@@ -0,0 +1,129 @@
+# startup_benchmark.py
+# Cold-start timings for main.py, each run in a fresh interpreter.
+#
+#   python startup_benchmark.py                 10 runs, median/p90/max
+#   python startup_benchmark.py --importtime    also list the slowest imports
+#   python startup_benchmark.py --headless      use SDL's dummy drivers
+#
+# Each child process reports:
+#   import_ms       `import main`
+#   startup_ms      main.startup(): window + background user load
+#   first_frame_ms  drawing and presenting the login screen
+#   total_ms        process launch to exit right after the first frame,
+#                   including interpreter start-up
+#
+# The child loads copies of the user, leaderboard and history files from a
+# temp directory, so a run never compacts or rewrites the real ones.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STORE_FILES = ("users.json", "users.journal", "users.db", "users.db-wal", "leaderboard.json")
+
+
+def use_scratch_stores(game, directory):
+    # Point main's stores at copies in `directory`: start-up does the same
+    # work on the same data without touching the real files.
+    # Imported here so they are not preloaded before `import main` is timed.
+    from game_log import GameLog
+    from leaderboard import Leaderboard
+    from persister import WriteBehind
+    from sqlite_store import SQLiteUserStore
+    from user_store import UserStore
+
+    for name in STORE_FILES:
+        if os.path.exists(os.path.join(HERE, name)):
+            shutil.copy(os.path.join(HERE, name), os.path.join(directory, name))
+    users_file = os.path.join(directory, "users.json")
+    if isinstance(game.USERS, SQLiteUserStore):
+        game.USERS = SQLiteUserStore(os.path.join(directory, "users.db"), import_from=users_file)
+    else:
+        game.USERS = UserStore(users_file)
+    game.PERSISTER = WriteBehind(game.USERS)
+    game.LEADERBOARD = Leaderboard(os.path.join(directory, "leaderboard.json"))
+    game.LEADERBOARD_PERSISTER = WriteBehind(game.LEADERBOARD)
+    game.GAME_LOG = GameLog(os.path.join(directory, "history"))
+    game.GAME_LOG_PERSISTER = WriteBehind(game.GAME_LOG)
+
+
+def child():
+    t0 = time.perf_counter()
+    import main as game
+    t1 = time.perf_counter()
+    tmp = tempfile.TemporaryDirectory()
+    use_scratch_stores(game, tmp.name)
+    copied = time.perf_counter()  # copying is not part of start-up
+    game.startup()
+    t2 = time.perf_counter()
+    game.draw_login_screen()
+    game.SCHEDULER.present()
+    t3 = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (t1 - t0) * 1e3,
+        "startup_ms": (t2 - copied) * 1e3,
+        "first_frame_ms": (t3 - t2) * 1e3,
+        "ready_ms": (t3 - t0 - (copied - t1)) * 1e3,
+    }))
+
+
+def run_once(env):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, __file__, "--child"], cwd=HERE, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["total_ms"] = (time.perf_counter() - start) * 1e3
+    return result
+
+
+def slowest_imports(env, top=15):
+    # `python -X importtime` for one cold import of main.
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         cwd=HERE, env=env, capture_output=True, text=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="main.py cold-start timings")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--headless", action="store_true", help="SDL dummy video, no audio")
+    parser.add_argument("--importtime", action="store_true", help="show the slowest imports")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child()
+        return 0
+
+    env = dict(os.environ)
+    if args.headless:
+        env["SUDOKU_HEADLESS"] = "1"
+
+    runs = [run_once(env) for _ in range(args.runs)]
+    for key in ("import_ms", "startup_ms", "first_frame_ms", "total_ms"):
+        values = sorted(r[key] for r in runs)
+        p90 = values[min(len(values) - 1, int(len(values) * 0.9))]
+        print(f"{key:16s} median {values[len(values) // 2]:8.1f}  p90 {p90:8.1f}  max {values[-1]:8.1f} ms")
+
+    if args.importtime:
+        print("\nslowest imports (cumulative / self, ms):")
+        for cumulative, own, name in slowest_imports(env):
+            print(f"  {cumulative / 1e3:8.1f} {own / 1e3:8.1f}  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
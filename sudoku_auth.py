@@ -1,24 +1,35 @@
 # sudoku_auth.py
 import customtkinter as ctk
-import sys
 
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
 
-app = ctk.CTk()
-app.geometry("400x400")
-app.title("Sudoku Login/Register")
+def main():
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
 
-def open_game():
-    app.destroy()
-    import sudoku_game
-    sudoku_game.run_game()
+    app = ctk.CTk()
+    app.geometry("400x400")
+    app.title("Sudoku Login/Register")
 
-frame = ctk.CTkFrame(master=app)
-frame.pack(pady=40, padx=20, fill="both", expand=True)
+    chosen = []
 
-ctk.CTkLabel(frame, text="Welcome to Sudoku", font=("Arial", 24, "italic")).pack(pady=20)
-ctk.CTkButton(frame, text="Login", command=open_game).pack(pady=10)
-ctk.CTkButton(frame, text="Register", command=open_game).pack(pady=10)
+    def open_game():
+        chosen.append(True)
+        app.destroy()
 
-app.mainloop()
+    frame = ctk.CTkFrame(master=app)
+    frame.pack(pady=40, padx=20, fill="both", expand=True)
+
+    ctk.CTkLabel(frame, text="Welcome to Sudoku", font=("Arial", 24, "italic")).pack(pady=20)
+    ctk.CTkButton(frame, text="Login", command=open_game).pack(pady=10)
+    ctk.CTkButton(frame, text="Register", command=open_game).pack(pady=10)
+
+    app.mainloop()
+
+    # pygame is only imported once the game is actually opened
+    if chosen:
+        import sudoku_game
+        sudoku_game.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
 import pygame
 import sys
-import random
 import time
 import copy
-import json
+
+from animation import Sequence, Timeline, call, wait
+from generator import UNGRADED_CELLS_TO_REMOVE, dig_puzzle, solution_stream
+from leaderboard import Leaderboard
+from persister import WriteBehind
+from user_store import new_level_stats, open_user_store
 
 # ---------------- Initialization ---------------- #
 pygame.init()
@@ -33,44 +37,24 @@ start_time = None
 selected_difficulty = None
 
 # Login System
-users = {}  # Loaded from JSON
 current_user = None
 active_input = "username"
 input_text = {"username": "", "password": ""}
 login_message = ""
 
+# Completion flash runs on the timeline instead of blocking the loop
+TIMELINE = Timeline()
+FLASH_STEP = 0.3  # seconds per on/off phase
+flash_on = False
+
 # ---------------- Persistent Storage ---------------- #
-def load_users():
-    global users
-    try:
-        with open("users.json", "r") as f:
-            content = f.read().strip()
-            if content:
-                users = json.loads(content)
-            else:
-                users = {}
-    except FileNotFoundError:
-        users = {}
-
-    # Ensure stats structure exists for all users
-    for user, data in users.items():
-        if "stats" not in data:
-            data["stats"] = {
-                "Easy": {"played": 0, "won": 0, "lost": 0, "best_time": None},
-                "Medium": {"played": 0, "won": 0, "lost": 0, "best_time": None},
-                "Hard": {"played": 0, "won": 0, "lost": 0, "best_time": None}
-            }
-        else:
-            for level in ["Easy", "Medium", "Hard"]:
-                if level not in data["stats"]:
-                    data["stats"][level] = {"played": 0, "won": 0, "lost": 0, "best_time": None}
-
-def save_users():
-    with open("users.json", "w") as f:
-        json.dump(users, f)
-
-load_users()
-save_users()  # ensure file exists
+# users.json snapshot + users.journal, or SQLite (SUDOKU_USER_STORE)
+USERS = open_user_store()
+USERS.load()
+WriteBehind(USERS).start()
+LEADERBOARD = Leaderboard()
+LEADERBOARD.load(USERS)
+WriteBehind(LEADERBOARD).start()
 
 # ---------------- Helper Functions ---------------- #
 def draw_text_centered(surface, text, y, font, color=BLACK):
@@ -106,74 +90,19 @@ def get_elapsed_time():
     return f"{minutes:02}:{seconds:02}"
 
 def update_stats(user, level, won, elapsed_time=0):
-    stats = users[user]["stats"][level]
-    stats["played"] += 1
+    USERS.record_result(user, level, won, elapsed_time)
     if won:
-        stats["won"] += 1
-        if stats.get("best_time") is None or elapsed_time < stats["best_time"]:
-            stats["best_time"] = elapsed_time
-    else:
-        stats["lost"] += 1
-    save_users()
+        LEADERBOARD.record(user, level, elapsed_time)
 
 # ---------------- Sudoku Logic ---------------- #
-def is_valid(board, row, col, num):
-    for i in range(9):
-        if board[row][i] == num or board[i][col] == num:
-            return False
-    start_row, start_col = 3*(row//3), 3*(col//3)
-    for i in range(start_row,start_row+3):
-        for j in range(start_col,start_col+3):
-            if board[i][j]==num:
-                return False
-    return True
-
-def solve_board(board):
-    for i in range(9):
-        for j in range(9):
-            if board[i][j]==0:
-                nums = list(range(1,10))
-                random.shuffle(nums)
-                for num in nums:
-                    if is_valid(board,i,j,num):
-                        board[i][j]=num
-                        if solve_board(board):
-                            return True
-                        board[i][j]=0
-                return False
-    return True
-
-def fill_diagonal_boxes(board):
-    for i in range(0,9,3):
-        fill_box(board,i,i)
-
-def fill_box(board,row_start,col_start):
-    nums = list(range(1,10))
-    random.shuffle(nums)
-    idx=0
-    for i in range(3):
-        for j in range(3):
-            board[row_start+i][col_start+j]=nums[idx]
-            idx+=1
-
 def remove_cells(board,difficulty):
-    levels = {"Easy":35,"Medium":45,"Hard":55}
-    cells_to_remove = levels[difficulty]
-    puzzle = copy.deepcopy(board)
-    count=0
-    while count<cells_to_remove:
-        i=random.randint(0,8)
-        j=random.randint(0,8)
-        if puzzle[i][j]!=0:
-            puzzle[i][j]=0
-            count+=1
-    return puzzle
+    return dig_puzzle(board, UNGRADED_CELLS_TO_REMOVE[difficulty])
+
+# Solved grids come from shuffling a seed grid, no backtracking involved
+SOLUTION_STREAM = solution_stream()
 
 def generate_full_board():
-    board = [[0]*9 for _ in range(9)]
-    fill_diagonal_boxes(board)
-    solve_board(board)
-    return board
+    return next(SOLUTION_STREAM)
 
 def load_puzzle(difficulty):
     global grid, original_grid, start_time
@@ -199,17 +128,22 @@ def is_board_complete_and_valid(board):
                 return False
     return True
 
-def flash_completed_board():
+def flash_completed_board(on_done):
+    def show(on):
+        global flash_on
+        flash_on = on
+    steps = []
     for _ in range(3):
-        WIN.fill(WHITE)
-        draw_grid()
+        steps += [call(lambda: show(True)), wait(FLASH_STEP),
+                  call(lambda: show(False)), wait(FLASH_STEP)]
+    TIMELINE.play(Sequence(steps, on_done=on_done), key="flash")
+
+def draw_flash_frame():
+    WIN.fill(WHITE)
+    draw_grid()
+    if flash_on:
         draw_numbers()
-        pygame.display.update()
-        pygame.time.delay(300)
-        WIN.fill(WHITE)
-        draw_grid()
-        pygame.display.update()
-        pygame.time.delay(300)
+    pygame.display.update()
 
 # ---------------- Screens ---------------- #
 def draw_login_screen():
@@ -256,7 +190,7 @@ def draw_history_screen(username):
     draw_text_centered(WIN, f"{username}'s History", 50, FONT)
     y_start = 120
     for level in ["Easy", "Medium", "Hard"]:
-        stats = users[username]["stats"].get(level, {"played":0,"won":0,"lost":0,"best_time":None})
+        stats = USERS.get_stats(username).get(level, new_level_stats())
         draw_text_centered(WIN, f"{level}:", y_start, SMALL_FONT, BLACK)
         draw_text_centered(WIN, f"Played: {stats['played']}, Won: {stats['won']}, Lost: {stats['lost']}", y_start+30, SMALL_FONT)
         best_time = stats.get("best_time")
@@ -297,7 +231,7 @@ def main():
     history_screen_open=False
 
     while True:
-        clock.tick(60)
+        TIMELINE.update(clock.tick(60) / 1000.0)
 
         if current_screen=="login":
             username_box,password_box,login_btn,reg_btn=draw_login_screen()
@@ -309,18 +243,29 @@ def main():
             draw_game()
             if is_board_complete_and_valid(grid):
                 elapsed_time=int(time.time()-start_time)
-                flash_completed_board()
-                update_stats(current_user, selected_difficulty, True, elapsed_time)
-                current_screen="win"
+                def finish_win(elapsed_time=elapsed_time):
+                    global current_screen
+                    update_stats(current_user, selected_difficulty, True, elapsed_time)
+                    current_screen="win"
+                flash_completed_board(finish_win)
+                current_screen="complete"
+        elif current_screen=="complete":
+            draw_flash_frame()
         elif current_screen=="win":
             play_again_btn,menu_btn=draw_win_screen()
 
         for event in pygame.event.get():
             if event.type==pygame.QUIT:
-                save_users()
+                USERS.close()
+                LEADERBOARD.close()
                 pygame.quit()
                 sys.exit()
 
+            # --- Completion flash: any key or click skips it ---
+            if current_screen=="complete" and event.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                TIMELINE.cancel("flash", finish=True)
+                continue
+
             # --- Login ---
             if current_screen=="login":
                 if event.type==pygame.MOUSEBUTTONDOWN:
@@ -333,9 +278,9 @@ def main():
                         pwd=input_text["password"].strip()
                         if user=="" or pwd=="":
                             login_message="Username/password cannot be empty!"
-                        elif user not in users:
+                        elif not USERS.has_user(user):
                             login_message="Username does not exist!"
-                        elif users[user]["password"]!=pwd:
+                        elif not USERS.check_login(user, pwd):
                             login_message="Incorrect password!"
                         else:
                             current_user=user
@@ -349,11 +294,9 @@ def main():
                             login_message="Username must be at least 3 chars!"
                         elif len(pwd)<5:
                             login_message="Password must be at least 5 chars!"
-                        elif user in users:
+                        elif not USERS.register(user, pwd):
                             login_message="Username already exists!"
                         else:
-                            users[user]={"password":pwd,"stats":{"Easy":{"played":0,"won":0,"lost":0,"best_time":None},"Medium":{"played":0,"won":0,"lost":0,"best_time":None},"Hard":{"played":0,"won":0,"lost":0,"best_time":None}}}
-                            save_users()
                             login_message="Registered! Please login."
                             input_text={"username":"","password":""}
 
@@ -2,27 +2,39 @@
 
 import customtkinter as ctk
 
-# Appearance settings
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
 
-# App setup
-app = ctk.CTk()
-app.geometry("400x300")
-app.title("Welcome to Sudoku")
+def main():
+    # Appearance settings
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
 
-def go_to_auth():
-    app.withdraw()  # Hide instead of destroy
-    import sudoku_auth
+    # App setup
+    app = ctk.CTk()
+    app.geometry("400x300")
+    app.title("Welcome to Sudoku")
 
+    started = []
 
-frame = ctk.CTkFrame(master=app)
-frame.pack(pady=50, padx=30, fill="both", expand=True)
+    def go_to_auth():
+        started.append(True)
+        app.destroy()
 
-label_title = ctk.CTkLabel(frame, text="Welcome to Sudoku!", font=("Arial", 24, "bold"))
-label_title.pack(pady=30)
+    frame = ctk.CTkFrame(master=app)
+    frame.pack(pady=50, padx=30, fill="both", expand=True)
 
-start_button = ctk.CTkButton(frame, text="Get Started", command=go_to_auth)
-start_button.pack(pady=10)
+    label_title = ctk.CTkLabel(frame, text="Welcome to Sudoku!", font=("Arial", 24, "bold"))
+    label_title.pack(pady=30)
 
-app.mainloop()
+    start_button = ctk.CTkButton(frame, text="Get Started", command=go_to_auth)
+    start_button.pack(pady=10)
+
+    app.mainloop()
+
+    # The next window opens only after this one's loop has ended
+    if started:
+        import sudoku_auth
+        sudoku_auth.main()
+
+
+if __name__ == "__main__":
+    main()
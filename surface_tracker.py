@@ -0,0 +1,36 @@
+# surface_tracker.py
+# Counts pygame.Surface allocations made from Python code.
+#
+# install() swaps pygame.Surface for a counting subclass; every call site
+# looks the class up at call time, so all of them are counted until
+# uninstall(). Surfaces created inside C (font.render, convert) are not seen
+# here; callers add TextCache misses for those.
+
+import pygame
+
+_original = pygame.Surface
+
+
+class _CountingSurface(_original):
+    created = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _CountingSurface.created += 1
+
+
+def install():
+    pygame.Surface = _CountingSurface
+
+
+def uninstall():
+    pygame.Surface = _original
+
+
+def installed():
+    return pygame.Surface is _CountingSurface
+
+
+def count():
+    # Surfaces allocated through pygame.Surface while installed.
+    return _CountingSurface.created
@@ -0,0 +1,369 @@
+# user_store.py
+# Users and their per-level stats, persisted as a snapshot plus an
+# append-only journal instead of rewriting users.json after every game.
+#
+#   users.json      snapshot: {"format": ..., "seq": n, "users": {...}},
+#                   only ever replaced atomically (temp file, fsync, rename)
+#   users.journal   one JSON record per line, e.g.
+#                   {"seq": 12, "op": "result", "user": "ann", "level": "Easy", "won": true, "time": 184}
+#
+# Loading reads the snapshot and replays journal records newer than its
+# seq, so a crash between writing a snapshot and truncating the journal
+# never applies a record twice. A torn last line (crash mid-append) is
+# dropped. After `compact_every` journal records the journal is folded into
+# a new snapshot.
+#
+# A plain users dict (the old users.json layout) still loads, as do the
+# "username": "password" entries written by the older registration tools.
+#
+# With a persister.WriteBehind attached, changes still apply in memory at
+# once but their journal lines are written and fsynced in batches on the
+# persister's thread, and compaction snapshots are written there too.
+#
+# open_user_store() picks the backend: SUDOKU_USER_STORE=sqlite selects
+# sqlite_store.SQLiteUserStore (users.db) for installs with many accounts.
+#
+# Besides the counters, each level keeps a quantile_sketch.DDSketch of win
+# times ("times") and a rolling average ("avg_time", weighted towards recent
+# wins). Both merge, so per-kiosk files can be combined offline:
+#
+#   python user_store.py merge combined.json kiosk1/users.json kiosk2/users.json
+#   python user_store.py export [users.json] > stats.csv
+
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import threading
+
+from persister import PersistedStore
+from quantile_sketch import DDSketch
+
+USERS_FILE = "users.json"
+SNAPSHOT_FORMAT = "sudoku-users/1"
+LEVELS = ("Easy", "Medium", "Hard")
+COMPACT_EVERY = 200
+ROLLING_WEIGHT = 0.2  # share of the newest win in avg_time, roughly the last 10
+
+
+def new_level_stats():
+    return {"played": 0, "won": 0, "lost": 0, "best_time": None, "avg_time": None, "times": None}
+
+
+def _normalize(users):
+    # Every user gets {"password": ..., "stats": {level: {...}}}.
+    for name, data in list(users.items()):
+        if isinstance(data, str):
+            data = users[name] = {"password": data}
+        stats = data.setdefault("stats", {})
+        for level in LEVELS:
+            if not isinstance(stats.get(level), dict):
+                stats[level] = new_level_stats()
+    return users
+
+
+def apply_result(stats, won, elapsed_time, hinted=False):
+    # Fold one finished game into a level's stats dict. A win that used a
+    # hint counts as won but leaves the times alone.
+    stats["played"] += 1
+    if won:
+        stats["won"] += 1
+        if hinted:
+            return
+        if stats.get("best_time") is None or elapsed_time < stats["best_time"]:
+            stats["best_time"] = elapsed_time
+        sketch = time_sketch(stats)
+        sketch.add(elapsed_time)
+        stats["times"] = sketch.to_dict()
+        avg = stats.get("avg_time")
+        stats["avg_time"] = elapsed_time if avg is None else avg + ROLLING_WEIGHT * (elapsed_time - avg)
+    else:
+        stats["lost"] += 1
+
+
+def time_sketch(stats):
+    # The level's win times as a DDSketch (empty before the first win).
+    return DDSketch.from_dict(stats["times"]) if stats.get("times") else DDSketch()
+
+
+def time_quantiles(stats, qs=(0.5, 0.9)):
+    # Win-time quantiles for a level, None where there are no wins yet.
+    sketch = time_sketch(stats)
+    return [sketch.quantile(q) for q in qs]
+
+
+def merge_level_stats(stats, other):
+    # Fold another copy of a level's stats (e.g. from another kiosk) in.
+    won = stats["won"]
+    for key in ("played", "won", "lost"):
+        stats[key] += other[key]
+    if other.get("best_time") is not None:
+        if stats.get("best_time") is None or other["best_time"] < stats["best_time"]:
+            stats["best_time"] = other["best_time"]
+    if other.get("times"):
+        stats["times"] = time_sketch(stats).merge(time_sketch(other)).to_dict()
+    if other.get("avg_time") is not None:
+        if stats.get("avg_time") is None:
+            stats["avg_time"] = other["avg_time"]
+        else:  # weighted by wins; the recency order across kiosks is unknown
+            stats["avg_time"] = (stats["avg_time"] * won + other["avg_time"] * other["won"]) / max(1, won + other["won"])
+
+
+def _fsync_dir(path):
+    # Make a rename durable; not possible (or needed) everywhere.
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data):
+    # Replace `path` with `data` (bytes) so readers only ever see the old or
+    # the new file, never a partial one.
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+class UserStore(PersistedStore):
+
+    def __init__(self, path=USERS_FILE, journal_path=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal"
+        self.compact_every = compact_every
+        self.users = {}
+        self.seq = 0             # seq of the last applied record
+        self.journal_records = 0  # records in the journal since the snapshot
+        self._journal = None
+        self._pending = []        # encoded journal lines not yet written
+        self._lock = threading.Lock()
+
+    # ---- loading / recovery ----
+    def load(self, read_only=False):
+        # read_only replays without repairing or compacting anything, for
+        # tools reading files a running game may own.
+        snapshot_seq = self._read_snapshot()
+        self.seq = snapshot_seq
+        self.journal_records = 0
+        good_bytes = 0
+        try:
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        for line in data.splitlines(keepends=True):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # torn tail from a crash mid-append
+            if not line.endswith(b"\n"):
+                break
+            good_bytes += len(line)
+            self.journal_records += 1
+            # skips records already in the snapshot, and repeats of a batch
+            # that was retried after a failed write
+            if record.get("seq", 0) > self.seq:
+                self._apply(record)
+                self.seq = record["seq"]
+        if read_only:
+            return self.users
+        if good_bytes < len(data):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_bytes)
+        if self.journal_records >= self.compact_every:
+            self.compact()
+        return self.users
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, "r") as f:
+                content = f.read().strip()
+        except FileNotFoundError:
+            content = ""
+        data = json.loads(content) if content else {}
+        if isinstance(data.get("format"), str):
+            self.users = _normalize(data.get("users", {}))
+            return data.get("seq", 0)
+        self.users = _normalize(data)  # legacy plain users dict
+        return 0
+
+    def _apply(self, record):
+        op = record["op"]
+        if op == "register":
+            self.users[record["user"]] = {"password": record["password"],
+                                          "stats": {level: new_level_stats() for level in LEVELS}}
+        elif op == "result":
+            stats = self.users[record["user"]]["stats"][record["level"]]
+            apply_result(stats, record["won"], record.get("time", 0), record.get("hinted", False))
+
+    # ---- writes ----
+    def _append(self, record):
+        # Applied in memory at once; the journal line is written right here,
+        # or later by the attached persister.
+        with self._lock:
+            self.seq += 1
+            record["seq"] = self.seq
+            self._apply(record)
+            self._pending.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            self.journal_records += 1
+        self._changed()
+
+    def register(self, username, password):
+        # False if the name is taken.
+        if username in self.users:
+            return False
+        self._append({"op": "register", "user": username, "password": password})
+        return True
+
+    def record_result(self, username, level, won, elapsed_time=0, hinted=False):
+        if username not in self.users:
+            return
+        record = {"op": "result", "user": username, "level": level,
+                  "won": bool(won), "time": elapsed_time}
+        if hinted:
+            record["hinted"] = True
+        self._append(record)
+
+    def pending_count(self):
+        return len(self._pending)
+
+    def write_pending(self):
+        # Append the buffered lines with a single fsync, then compact if due.
+        # Only the snapshot serialisation holds the lock; disk I/O does not.
+        with self._lock:
+            lines, self._pending = self._pending, []
+            snapshot = None
+            since_snapshot = self.journal_records
+            if since_snapshot >= self.compact_every:
+                snapshot = self._snapshot_bytes()
+                self.journal_records = 0
+        try:
+            if lines:
+                if self._journal is None:
+                    self._journal = open(self.journal_path, "ab")
+                self._journal.write(b"".join(lines))
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+            if snapshot is not None:
+                self._write_snapshot(snapshot)
+        except Exception:
+            with self._lock:
+                self._pending[:0] = lines
+                self.journal_records += since_snapshot if snapshot is not None else 0
+            raise
+        return len(lines)
+
+    def compact(self):
+        # Write everything to a new snapshot, then start an empty journal.
+        with self._lock:
+            self._pending = []
+            snapshot = self._snapshot_bytes()
+            self.journal_records = 0
+        self._write_snapshot(snapshot)
+
+    def _snapshot_bytes(self):
+        return json.dumps({"format": SNAPSHOT_FORMAT, "seq": self.seq, "users": self.users}).encode()
+
+    def _write_snapshot(self, data):
+        write_atomic(self.path, data)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
+
+    # ---- reads ----
+    def has_user(self, username):
+        return username in self.users
+
+    def check_login(self, username, password):
+        user = self.users.get(username)
+        return user is not None and user["password"] == password
+
+    def get_stats(self, username):
+        # {level: {"played", "won", "lost", "best_time"}}
+        return self.users[username]["stats"]
+
+    def best_times(self, level, limit=10):
+        # [(name, seconds)] fastest first. Scans every user; the game reads
+        # leaderboard.Leaderboard instead, this only seeds it.
+        timed = ((data["stats"][level]["best_time"], name) for name, data in self.users.items()
+                 if data["stats"][level]["best_time"] is not None)
+        return [(name, t) for t, name in heapq.nsmallest(limit, timed)]
+
+    def _close_files(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def merge_users(users, other):
+    # Add another users dict into `users`; a name in both keeps the first
+    # password and gets its stats merged.
+    for name, data in _normalize(other).items():
+        if name not in users:
+            users[name] = data
+            continue
+        for level in LEVELS:
+            merge_level_stats(users[name]["stats"][level], data["stats"][level])
+    return users
+
+
+def open_user_store():
+    # The store the game should use, per SUDOKU_USER_STORE (journal|sqlite).
+    backend = os.environ.get("SUDOKU_USER_STORE", "journal")
+    if backend == "sqlite":
+        from sqlite_store import SQLiteUserStore
+        return SQLiteUserStore()
+    if backend != "journal":
+        raise ValueError(f"unknown SUDOKU_USER_STORE {backend!r} (journal or sqlite)")
+    return UserStore()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="User store tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge = sub.add_parser("merge", help="combine users.json files from several machines into a new file")
+    merge.add_argument("output")
+    merge.add_argument("sources", nargs="+")
+    export = sub.add_parser("export", help="per-user, per-level stats as CSV")
+    export.add_argument("source", nargs="?", default=USERS_FILE)
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        out = UserStore(args.output)
+        for path in (out.path, out.journal_path):
+            if os.path.exists(path):
+                parser.error(f"{path} already exists; merge writes a new file")
+        for path in args.sources:
+            merge_users(out.users, UserStore(path).load(read_only=True))
+        out.compact()
+        out.close()
+        print(f"merged {len(args.sources)} files, {len(out.users)} users into {args.output}")
+        return 0
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["user", "level", "played", "won", "lost", "best_time", "median_time", "p90_time", "avg_time"])
+    for name, data in sorted(UserStore(args.source).load(read_only=True).items()):
+        for level in LEVELS:
+            s = data["stats"][level]
+            times = time_quantiles(s) + [s.get("avg_time")]
+            writer.writerow([name, level, s["played"], s["won"], s["lost"], s.get("best_time")]
+                            + [None if t is None else round(t, 1) for t in times])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,32 @@
-import json
-import os
+from user_store import open_user_store
 
-USERS_FILE = "users.json"
-
-def load_users():
-    if not os.path.exists(USERS_FILE):
-        return {}
-    with open(USERS_FILE, "r") as f:
-        return json.load(f)
-
-def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f)
+# users.json snapshot plus users.journal, shared with the game
 
 def register_user():
-    users = load_users()
-    username = input("Enter new username: ")
-    if username in users:
-        print("Username already exists.")
-        return None
-    password = input("Enter new password: ")
-    users[username] = password
-    save_users(users)
+    store = open_user_store()
+    try:
+        store.load()
+        username = input("Enter new username: ")
+        if store.has_user(username):
+            print("Username already exists.")
+            return None
+        password = input("Enter new password: ")
+        store.register(username, password)
+    finally:
+        store.close()
     print("Registration successful!")
     return username
 
 def login_user():
-    users = load_users()
-    username = input("Username: ")
-    password = input("Password: ")
-    if username in users and users[username] == password:
+    store = open_user_store()
+    try:
+        store.load()
+        username = input("Username: ")
+        password = input("Password: ")
+        ok = store.check_login(username, password)
+    finally:
+        store.close()
+    if ok:
         print("Login successful!")
         return username
     print("Invalid credentials.")